@@ -15,7 +15,7 @@ from .database_utils import (
     fetchrow_with_timeout,
     execute_with_timeout
 )
-from .user_context.context import get_current_user_id, get_current_user_session
+from .user_context.context import get_current_user_id, get_current_user_session, invalidate_user_data
 from .user_context.tools import track_last_action, track_conversation_topic
 from .security import require_user_context, DataAccessViolationError
 
@@ -241,6 +241,7 @@ async def set_running_goal_tool(goal_type: str, target_value: float,
             existing_goals,
             user_id
         )
+        invalidate_user_data(user_id)
         
         track_last_action("set_goal")
         track_conversation_topic("goals")
@@ -476,7 +477,11 @@ async def predict_race_time_tool(distance: float, goal_date: str,
 @handle_database_errors
 @require_user_context
 async def get_social_feed_tool(limit: int = 10) -> str:
-    """Get personalized social feed with posts from followed users and groups."""
+    """Get personalized social feed with posts from followed users and groups.
+    
+    Args:
+        limit: Number of posts to retrieve (default: 10)
+    """
     try:
         user_id = get_current_user_id()
         pool = await get_pool()
@@ -551,13 +556,13 @@ async def get_social_feed_tool(limit: int = 10) -> str:
 @handle_database_errors
 @require_user_context
 async def create_run_post_tool(run_id: str, caption: str = None, 
-                              share_to_groups: str = "false") -> str:
+                              share_to_groups: bool = False) -> str:
     """Create a social post from a run.
     
     Args:
         run_id: ID of the run to share
         caption: Optional caption for the post
-        share_to_groups: "true" to share to all joined groups
+        share_to_groups: Share the post to all joined groups
     """
     try:
         user_id = get_current_user_id()
@@ -594,7 +599,7 @@ async def create_run_post_tool(run_id: str, caption: str = None,
         
         # Share to groups if requested
         groups_shared = 0
-        if share_to_groups.lower() == "true":
+        if share_to_groups:
             group_memberships = await fetch_with_timeout(
                 pool,
                 'SELECT "groupId" FROM "RunGroupMember" WHERE "socialProfileId"=$1',
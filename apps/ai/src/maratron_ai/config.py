@@ -117,6 +117,10 @@ class ServerConfig(BaseModel):
     # Performance settings
     max_concurrent_operations: int = Field(default=100, ge=1, le=1000)
     operation_timeout: float = Field(default=30.0, ge=1.0, le=300.0)
+    
+    # Resource cache settings
+    schema_cache_ttl: float = Field(default=60.0, ge=0.0, le=3600.0, description="database://schema cache TTL in seconds")
+    stats_cache_ttl: float = Field(default=10.0, ge=0.0, le=3600.0, description="database://stats cache TTL in seconds")
 
 
 class Config(BaseSettings):
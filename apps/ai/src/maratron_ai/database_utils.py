@@ -1,8 +1,8 @@
 """Database utilities with error handling and retry logic."""
 import asyncio
 import logging
-from typing import Any, Callable, TypeVar, Optional
-from functools import wraps
+from typing import Any, Callable, Iterable, Optional, Sequence, TypeVar, Union
+from functools import lru_cache, wraps
 import asyncpg
 from .config import get_config
 
@@ -84,7 +84,8 @@ def handle_database_errors(func: Callable[..., T]) -> Callable[..., T]:
     return wrapper
 
 
-async def execute_with_timeout(pool: asyncpg.Pool, query: str, *args, timeout: Optional[float] = None) -> Any:
+async def execute_with_timeout(pool: Union[asyncpg.Pool, asyncpg.Connection], query: str, *args,
+                               timeout: Optional[float] = None) -> Any:
     """Execute query with configurable timeout."""
     timeout = timeout or config.database.query_timeout
     
@@ -98,6 +99,25 @@ async def execute_with_timeout(pool: asyncpg.Pool, query: str, *args, timeout: O
         raise DatabaseOperationError(f"Query timed out after {timeout} seconds")
 
 
+async def executemany_with_timeout(pool: Union[asyncpg.Pool, asyncpg.Connection], query: str,
+                                  args: Iterable[Sequence[Any]], timeout: Optional[float] = None) -> None:
+    """Execute a statement for each argument tuple with configurable timeout.
+    
+    The batch is atomic: if any row fails, none of them are applied. Pass a
+    connection instead of the pool to run the batch inside its transaction.
+    """
+    timeout = timeout or config.database.query_timeout
+    
+    try:
+        await asyncio.wait_for(
+            pool.executemany(query, args),
+            timeout=timeout
+        )
+    except asyncio.TimeoutError:
+        logger.error(f"Query timed out after {timeout} seconds: {query[:100]}...")
+        raise DatabaseOperationError(f"Query timed out after {timeout} seconds")
+
+
 async def fetch_with_timeout(pool: asyncpg.Pool, query: str, *args, timeout: Optional[float] = None) -> Any:
     """Fetch query results with configurable timeout."""
     timeout = timeout or config.database.query_timeout
@@ -126,8 +146,13 @@ async def fetchrow_with_timeout(pool: asyncpg.Pool, query: str, *args, timeout:
         raise DatabaseOperationError(f"Query timed out after {timeout} seconds")
 
 
+@lru_cache(maxsize=256)
 def quote_identifier(name: str) -> str:
-    """Safely quote an SQL identifier with enhanced validation."""
+    """Safely quote an SQL identifier with enhanced validation.
+    
+    Results are cached since callers quote the same table names repeatedly;
+    invalid names raise every time and are never cached.
+    """
     if not name:
         raise ValueError("Identifier cannot be empty")
     
@@ -158,8 +158,9 @@ async def analyze_training_load_tool(period: str = "4weeks") -> str:
                    "Continue recording runs to track your training progression!"
         
         # Analyze training load progression
-        load_analysis = _analyze_load_progression(runs)
-        weekly_trends = _analyze_weekly_load_trends(runs)
+        weekly_loads = _group_runs_by_week(runs)
+        load_analysis = _analyze_load_progression(weekly_loads)
+        weekly_trends = _analyze_weekly_load_trends(weekly_loads)
         recommendations = _generate_load_recommendations(load_analysis, weekly_trends)
         
         return _format_training_load_analysis(load_analysis, weekly_trends, recommendations, period)
@@ -424,25 +425,31 @@ def _assess_recovery_needs(runs: List[Dict], user_data: Dict, focus_area: str) -
     return recovery_needs
 
 
-def _analyze_load_progression(runs: List[Dict]) -> Dict:
-    """Analyze training load progression over time."""
-    if not runs:
-        return {'trend': 'unknown', 'progression_rate': 0}
-    
-    # Group runs by week
+def _group_runs_by_week(runs: List[Dict]) -> Dict:
+    """Bucket runs by the Monday of their week, in chronological order."""
     weekly_loads = {}
     for run in runs:
-        week_start = run['date'] - timedelta(days=run['date'].weekday())
-        week_key = week_start.strftime('%Y-%W')
+        run_day = run['date'].date()
+        week_start = run_day - timedelta(days=run_day.weekday())
         
-        if week_key not in weekly_loads:
-            weekly_loads[week_key] = {'distance': 0, 'runs': 0}
+        week = weekly_loads.get(week_start)
+        if week is None:
+            week = weekly_loads[week_start] = {'distance': 0, 'runs': 0, 'days': set()}
         
-        weekly_loads[week_key]['distance'] += run['distance']
-        weekly_loads[week_key]['runs'] += 1
+        week['distance'] += run['distance']
+        week['runs'] += 1
+        week['days'].add(run_day)
+    
+    return dict(sorted(weekly_loads.items()))
+
+
+def _analyze_load_progression(weekly_loads: Dict) -> Dict:
+    """Analyze training load progression over time."""
+    if not weekly_loads:
+        return {'trend': 'unknown', 'progression_rate': 0}
     
     # Calculate progression
-    weeks = sorted(weekly_loads.keys())
+    weeks = list(weekly_loads.keys())
     if len(weeks) < 2:
         return {'trend': 'insufficient_data', 'progression_rate': 0}
     
@@ -468,24 +475,11 @@ def _analyze_load_progression(runs: List[Dict]) -> Dict:
     }
 
 
-def _analyze_weekly_load_trends(runs: List[Dict]) -> Dict:
+def _analyze_weekly_load_trends(weekly_data: Dict) -> Dict:
     """Analyze weekly training load trends."""
-    if not runs:
+    if not weekly_data:
         return {'pattern': 'unknown', 'consistency': 0}
     
-    # Group by week and calculate loads
-    weekly_data = {}
-    for run in runs:
-        week_start = run['date'] - timedelta(days=run['date'].weekday())
-        week_key = week_start.strftime('%Y-%W')
-        
-        if week_key not in weekly_data:
-            weekly_data[week_key] = {'distance': 0, 'runs': 0, 'days': set()}
-        
-        weekly_data[week_key]['distance'] += run['distance']
-        weekly_data[week_key]['runs'] += 1
-        weekly_data[week_key]['days'].add(run['date'].strftime('%Y-%m-%d'))
-    
     # Calculate consistency
     weeks = list(weekly_data.keys())
     if len(weeks) < 2:
@@ -8,6 +8,7 @@ import json
 import uuid
 import asyncpg
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional, Any, Tuple
 from .database_utils import (
     handle_database_errors, 
@@ -234,6 +235,7 @@ def _analyze_environment_performance(runs: List[Dict]) -> Dict:
         env = run.get('trainingEnvironment', 'unknown')
         if env not in environments:
             environments[env] = {
+                'display': env.title(),
                 'runs': [],
                 'total_distance': 0,
                 'count': 0
@@ -600,6 +602,7 @@ def _analyze_environment_usage(runs: List[Dict]) -> Dict:
         env = run.get('trainingEnvironment', 'unknown')
         if env not in usage:
             usage[env] = {
+                'display': env.title(),
                 'count': 0,
                 'total_distance': 0,
                 'percentage': 0
@@ -661,12 +664,12 @@ def _format_environment_analysis(environment_analysis: Dict, recommendations: Li
     
     # Environment breakdown
     result += "🏃 **Training Environment Breakdown:**\n"
-    for env, data in environment_analysis.items():
+    for data in environment_analysis.values():
         count = data['count']
         avg_distance = data['avg_distance']
         percentage = round((count / num_runs) * 100, 1)
         
-        result += f"• {env.title()}: {count} runs ({percentage}%) - Avg: {avg_distance:.1f} miles\n"
+        result += f"• {data['display']}: {count} runs ({percentage}%) - Avg: {avg_distance:.1f} miles\n"
     
     result += "\n💡 **Insights & Recommendations:**\n"
     for rec in recommendations:
@@ -680,16 +683,18 @@ def _format_environment_analysis(environment_analysis: Dict, recommendations: Li
 def _format_route_recommendations(recommendations: Dict, goal_type: str, 
                                 distance: float, conditions: str) -> str:
     """Format route recommendations."""
-    result = f"🗺️ Route Recommendations\n\n"
-    result += f"🎯 **Goal:** {goal_type.title()} training\n"
-    result += f"📏 **Distance:** {distance} miles\n"
-    result += f"🌤️ **Conditions:** {conditions.title()}\n\n"
-    
-    result += f"🛤️ **Recommended Route Type:** {recommendations['route_type']}\n"
-    result += f"🏃 **Surface:** {recommendations['surface']}\n"
-    result += f"⛰️ **Terrain:** {recommendations['terrain']}\n"
-    result += f"🌍 **Environment:** {recommendations['environment']}\n\n"
-    
+    # Adjacent literals are joined at compile time, so the header is built in one pass
+    result = (
+        f"🗺️ Route Recommendations\n\n"
+        f"🎯 **Goal:** {goal_type.title()} training\n"
+        f"📏 **Distance:** {distance} miles\n"
+        f"🌤️ **Conditions:** {conditions.title()}\n\n"
+        f"🛤️ **Recommended Route Type:** {recommendations['route_type']}\n"
+        f"🏃 **Surface:** {recommendations['surface']}\n"
+        f"⛰️ **Terrain:** {recommendations['terrain']}\n"
+        f"🌍 **Environment:** {recommendations['environment']}\n\n"
+    )
+
     if recommendations['specific_advice']:
         result += "💡 **Specific Recommendations:**\n"
         for advice in recommendations['specific_advice']:
@@ -730,37 +735,41 @@ def _format_elevation_analysis(elevation_analysis: Dict, recommendations: List[s
     return result
 
 
+# Section keys and headings rendered by _format_seasonal_advice, in display order
+_SEASONAL_SECTIONS = (
+    ('training_emphasis', "🏃 **Training Emphasis:**"),
+    ('environmental_tips', "🌤️ **Environmental Tips:**"),
+    ('equipment_suggestions', "🎽 **Equipment Suggestions:**"),
+    ('race_considerations', "🏁 **Race Considerations:**"),
+)
+
+
 def _format_seasonal_advice(seasonal_advice: Dict, season: str) -> str:
     """Format seasonal training advice."""
-    result = f"🌱 Seasonal Training Guide - {season.title()}\n\n"
-    result += f"🎯 **Season Focus:** {seasonal_advice['focus']}\n\n"
-    
-    if seasonal_advice['training_emphasis']:
-        result += "🏃 **Training Emphasis:**\n"
-        for emphasis in seasonal_advice['training_emphasis']:
-            result += f"• {emphasis}\n"
-        result += "\n"
-    
-    if seasonal_advice['environmental_tips']:
-        result += "🌤️ **Environmental Tips:**\n"
-        for tip in seasonal_advice['environmental_tips']:
-            result += f"• {tip}\n"
-        result += "\n"
-    
-    if seasonal_advice['equipment_suggestions']:
-        result += "🎽 **Equipment Suggestions:**\n"
-        for suggestion in seasonal_advice['equipment_suggestions']:
-            result += f"• {suggestion}\n"
-        result += "\n"
-    
-    if seasonal_advice['race_considerations']:
-        result += "🏁 **Race Considerations:**\n"
-        for consideration in seasonal_advice['race_considerations']:
-            result += f"• {consideration}\n"
-    
-    result += f"\n🌟 **Seasonal Wisdom:** Embrace the unique opportunities each season offers for your running!"
+    # Freeze the advice into hashable tuples so the rendered output can be memoized
+    sections = tuple(tuple(seasonal_advice[key]) for key, _ in _SEASONAL_SECTIONS)
+    return _render_seasonal_advice(season, seasonal_advice['focus'], sections)
+
+
+@lru_cache(maxsize=64)
+def _render_seasonal_advice(season: str, focus: str, sections: Tuple[Tuple[str, ...], ...]) -> str:
+    """Render seasonal advice once per distinct (season, advice) combination."""
+    parts = [
+        f"🌱 Seasonal Training Guide - {season.title()}\n\n",
+        f"🎯 **Season Focus:** {focus}\n\n",
+    ]
     
-    return result
+    last_index = len(_SEASONAL_SECTIONS) - 1
+    for index, ((_, heading), items) in enumerate(zip(_SEASONAL_SECTIONS, sections)):
+        if items:
+            parts.append(f"{heading}\n")
+            parts.append("".join(f"• {item}\n" for item in items))
+            if index != last_index:
+                parts.append("\n")
+    
+    parts.append("\n🌟 **Seasonal Wisdom:** Embrace the unique opportunities each season offers for your running!")
+    
+    return "".join(parts)
 
 
 def _format_environment_optimization(usage: Dict, suggestions: List[str], num_runs: int) -> str:
@@ -770,12 +779,12 @@ def _format_environment_optimization(usage: Dict, suggestions: List[str], num_ru
     
     # Current usage breakdown
     result += "📈 **Current Environment Usage:**\n"
-    for env, data in usage.items():
+    for data in usage.values():
         count = data['count']
         percentage = data['percentage']
         avg_distance = data['avg_distance']
         
-        result += f"• {env.title()}: {percentage}% ({count} runs) - Avg: {avg_distance} miles\n"
+        result += f"• {data['display']}: {percentage}% ({count} runs) - Avg: {avg_distance} miles\n"
     
     result += "\n🔧 **Optimization Suggestions:**\n"
     for suggestion in suggestions:
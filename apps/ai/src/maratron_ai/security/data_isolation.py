@@ -1,7 +1,11 @@
 """Data isolation security layer to prevent cross-user data access."""
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Deque, Tuple
 from functools import wraps
 from ..user_context.context import get_current_user_id
 from ..database_utils import fetch_with_timeout, fetchrow_with_timeout, execute_with_timeout
@@ -15,17 +19,66 @@ class DataAccessViolationError(Exception):
 
 
 class SecurityAuditLog:
-    """Security audit logging for data access."""
+    """Security audit logging for data access.
     
-    @staticmethod
-    def log_data_access(user_id: str, operation: str, table: str, 
+    Successful data-access records are buffered with the time they happened and
+    written out in batches, one log line per access, either once FLUSH_THRESHOLD
+    records accumulate or when the background flush fires. Blocked access and
+    violations are logged immediately.
+    """
+    
+    FLUSH_THRESHOLD = 100
+    FLUSH_INTERVAL = 0.5  # seconds
+    
+    _buffer: Deque[Tuple[float, str, str, str, Dict[str, Any]]] = deque()
+    _flush_task: Optional[asyncio.Task] = None
+    
+    @classmethod
+    def log_data_access(cls, user_id: str, operation: str, table: str, 
                        filters: Dict[str, Any], success: bool = True):
         """Log data access attempts."""
         if success:
-            logger.info(f"Data access: user={user_id}, op={operation}, table={table}, filters={filters}")
+            cls._buffer.append((time.time(), user_id, operation, table, filters))
+            if len(cls._buffer) >= cls.FLUSH_THRESHOLD:
+                cls.flush()
+            else:
+                cls._schedule_flush()
         else:
             logger.warning(f"BLOCKED data access: user={user_id}, op={operation}, table={table}, filters={filters}")
     
+    @classmethod
+    def flush(cls):
+        """Emit all buffered data-access records, one line each with its access time."""
+        if not cls._buffer:
+            return
+        
+        records = [cls._buffer.popleft() for _ in range(len(cls._buffer))]
+        for accessed_at, user_id, operation, table, filters in records:
+            at = datetime.fromtimestamp(accessed_at, timezone.utc).isoformat(timespec="milliseconds")
+            logger.info(f"Data access: at={at}, user={user_id}, op={operation}, table={table}, filters={filters}")
+    
+    @classmethod
+    def _schedule_flush(cls):
+        """Ensure a deferred flush is pending, or flush now outside an event loop."""
+        if cls._flush_task is not None and not cls._flush_task.done():
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            cls.flush()
+            return
+        
+        cls._flush_task = loop.create_task(cls._deferred_flush())
+    
+    @classmethod
+    async def _deferred_flush(cls):
+        """Flush buffered records after FLUSH_INTERVAL."""
+        try:
+            await asyncio.sleep(cls.FLUSH_INTERVAL)
+        finally:
+            cls.flush()
+    
     @staticmethod 
     def log_security_violation(user_id: str, attempted_access: str, reason: str):
         """Log security violations."""
@@ -152,8 +205,16 @@ class SecureDataAccess:
         
         return any(pattern in query_upper for pattern in user_filter_patterns)
     
-    async def get_user_runs(self, pool, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Secure method to get user's runs only."""
+    async def get_user_runs(self, pool, user_id: str, limit: int = 10,
+                            preferred_unit: Optional[str] = None,
+                            offset: int = 0) -> List[Dict[str, Any]]:
+        """Secure method to get user's runs only.
+        
+        When preferred_unit is "miles" or "kilometers", distances are converted
+        in the query and returned with that unit. offset skips that many of
+        the most recent runs, for paging. limit is bound directly to the
+        query's LIMIT, so callers never need to trim the result.
+        """
         current_user = get_current_user_id()
         
         # Only allow access to current user's data
@@ -165,18 +226,36 @@ class SecureDataAccess:
             raise DataAccessViolationError("🔒 Access denied: Can only access your own data")
         
         query = '''
-            SELECT id, date, duration, distance, "distanceUnit", name, pace, notes, "elevationGain"
+            SELECT id, date, duration,
+                   CASE
+                       WHEN "distanceUnit"::text = 'miles' AND $3::text = 'kilometers'
+                           THEN round((distance * 1.60934)::numeric, 2)::float8
+                       WHEN "distanceUnit"::text = 'kilometers' AND $3::text = 'miles'
+                           THEN round((distance / 1.60934)::numeric, 2)::float8
+                       ELSE distance
+                   END AS distance,
+                   CASE
+                       WHEN $3::text IN ('miles', 'kilometers') THEN $3::text
+                       ELSE "distanceUnit"::text
+                   END AS "distanceUnit",
+                   name, pace, notes, "elevationGain"
             FROM "Runs" 
             WHERE "userId" = $1 
             ORDER BY date DESC 
-            LIMIT $2
+            LIMIT $2 OFFSET $4
         '''
         
-        self.audit.log_data_access(current_user, "get_runs", "Runs", {"user_id": user_id, "limit": limit})
-        return await fetch_with_timeout(pool, query, user_id, limit)
+        self.audit.log_data_access(
+            current_user, "get_runs", "Runs", {"user_id": user_id, "limit": limit, "offset": offset}
+        )
+        return await fetch_with_timeout(pool, query, user_id, limit, preferred_unit, offset)
     
     async def get_user_shoes(self, pool, user_id: str) -> List[Dict[str, Any]]:
-        """Secure method to get user's shoes only."""
+        """Secure method to get user's shoes only.
+        
+        Active shoes come first; every row carries the active_count and
+        retired_count totals for the user.
+        """
         current_user = get_current_user_id()
         
         if current_user != user_id:
@@ -187,10 +266,12 @@ class SecureDataAccess:
             raise DataAccessViolationError("🔒 Access denied: Can only access your own data")
         
         query = '''
-            SELECT id, name, "maxDistance", "currentDistance", "distanceUnit", retired, notes, "createdAt"
+            SELECT id, name, "maxDistance", "currentDistance", "distanceUnit", retired, notes, "createdAt",
+                   COUNT(*) FILTER (WHERE NOT retired) OVER () AS active_count,
+                   COUNT(*) FILTER (WHERE retired) OVER () AS retired_count
             FROM "Shoes"
             WHERE "userId" = $1
-            ORDER BY "createdAt" DESC
+            ORDER BY retired ASC, "createdAt" DESC
         '''
         
         self.audit.log_data_access(current_user, "get_shoes", "Shoes", {"user_id": user_id})
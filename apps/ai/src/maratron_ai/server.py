@@ -1,8 +1,24 @@
 """Refactored MCP Server with proper Tools vs Resources separation."""
+import asyncio
 import asyncpg
+import atexit
+import importlib.util
+import queue
+import re
+import signal
+import sys
 import uuid
 import logging
-from typing import Optional
+import time
+from logging.handlers import QueueHandler, QueueListener
+import anyio
+from itertools import groupby
+from operator import itemgetter
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache, wraps
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from mcp import types
 from mcp.server.fastmcp import FastMCP
 from .config import get_config
 from .database_utils import (
@@ -75,37 +91,210 @@ from .competition_racing_tools import (
 from .weather_tools import (
     get_current_weather_tool,
     get_weather_forecast_tool,
-    analyze_weather_impact_tool
+    analyze_weather_impact_tool,
+    close_http_session
 )
-from .user_context.context import get_current_user_id
-from .security import secure_db, require_user_context, DataAccessViolationError
+from .user_context.context import get_current_user_id, invalidate_user_data, MAX_RESULTS_PER_QUERY
+from .security import secure_db, require_user_context, DataAccessViolationError, SecurityAuditLog
 
 # Load configuration
 config = get_config()
 
-# Initialize FastMCP server with configuration
-mcp = FastMCP(config.server.name, config.server.version)
+@asynccontextmanager
+async def _server_lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Create the database pool before the first request is served.
+    
+    The pool must be created on the server's own event loop, so this runs as
+    the FastMCP lifespan rather than ahead of mcp.run(). A failure here is only
+    logged; get_pool() retries lazily on first use.
+    """
+    try:
+        await get_pool()
+    except Exception as e:
+        logger.warning(f"Database pool pre-warm failed, will retry on first use: {e}")
+    yield
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, config.server.log_level.value),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+
+# Initialize FastMCP server with configuration
+mcp = FastMCP(config.server.name, config.server.version, lifespan=_server_lifespan)
+
+# Configure logging. The root logger's handlers (FastMCP installs its own when
+# constructed) are moved behind a QueueListener thread and replaced by a single
+# QueueHandler, so a burst of log records does not block the event loop on I/O.
+def _install_log_queue() -> QueueListener:
+    """Route root logging through a queue; returns the started listener."""
+    root = logging.getLogger()
+    for handler in root.handlers:
+        # Already installed, e.g. the module was imported under a second name
+        if isinstance(handler, QueueHandler) and hasattr(handler, "listener"):
+            return handler.listener
+    
+    handlers = root.handlers[:]
+    if not handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        handlers = [handler]
+        root.setLevel(getattr(logging, config.server.log_level.value))
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.listener = listener
+    root.addHandler(queue_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+_log_listener = _install_log_queue()
 logger = logging.getLogger(__name__)
 
 # Connection pool placeholder
 DB_POOL: Optional[asyncpg.Pool] = None
+# Serializes first-time pool creation when handlers start concurrently
+_POOL_LOCK = asyncio.Lock()
+
+
+def _affected(tag: str) -> int:
+    """Return the row count from an asyncpg command tag such as "UPDATE 3"."""
+    return int(tag.rsplit(" ", 1)[-1])
+
+# Rendered database:// resources: key -> (cached_at, data_version, markdown).
+# Entries expire after their TTL or as soon as a write tool bumps the version.
+_resource_cache: Dict[str, Tuple[float, int, str]] = {}
+_data_version = 0
+
 
-# Use the enhanced quote_identifier from database_utils
-_quote_ident = quote_identifier
+def _get_cached_resource(key: str, ttl: float) -> Optional[str]:
+    """Return cached resource output if it is fresh and no writes happened since."""
+    entry = _resource_cache.get(key)
+    if entry is None:
+        return None
+    
+    cached_at, version, content = entry
+    if version != _data_version or time.monotonic() - cached_at >= ttl:
+        return None
+    return content
+
+
+def _cache_resource(key: str, content: str) -> None:
+    """Store rendered resource output against the current data version."""
+    _resource_cache[key] = (time.monotonic(), _data_version, content)
+
+
+def _invalidate_resource_cache() -> None:
+    """Invalidate cached resources after a write."""
+    global _data_version
+    _data_version += 1
+
+
+# Profile rows from secure_db.get_user_profile: user_id -> (cached_at, row),
+# least recently used first. Entries are dropped when the user row changes.
+_PROFILE_CACHE_TTL = 30.0
+_PROFILE_CACHE_SIZE = 256
+_profile_cache: OrderedDict[str, Tuple[float, asyncpg.Record]] = OrderedDict()
+
+
+async def _get_user_profile(pool: asyncpg.Pool, user_id: str) -> Optional[asyncpg.Record]:
+    """secure_db.get_user_profile, served from a short-lived per-user cache.
+    
+    Only the current user's own profile is served from the cache; any other
+    lookup goes to secure_db so its isolation check still applies.
+    """
+    entry = _profile_cache.get(user_id)
+    if entry is not None and get_current_user_id() == user_id:
+        cached_at, profile = entry
+        if time.monotonic() - cached_at < _PROFILE_CACHE_TTL:
+            _profile_cache.move_to_end(user_id)
+            return profile
+    
+    profile = await secure_db.get_user_profile(pool, user_id)
+    if profile is not None:
+        _profile_cache[user_id] = (time.monotonic(), profile)
+        _profile_cache.move_to_end(user_id)
+        if len(_profile_cache) > _PROFILE_CACHE_SIZE:
+            _profile_cache.popitem(last=False)
+    return profile
+
+
+def invalidate_user_profile(user_id: str) -> None:
+    """Drop a user's cached profile after their row is updated or deleted."""
+    _profile_cache.pop(user_id, None)
+    invalidate_user_data(user_id)
+
+
+# Composite indexes (declared in apps/web/prisma/schema.prisma) that keep the
+# per-user "latest N" queries as index range scans instead of full sorts. They are
+# matched on table and leading columns, since the same index may have been created
+# by hand under another name (e.g. idx_runs_user_date from performance_indexes.sql).
+_EXPECTED_INDEXES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("Runs", ("userId", "date DESC")),
+    ("Shoes", ("userId", "createdAt DESC")),
+    ("UserSessions", ("userId", "createdAt DESC")),
+)
+
+_INDEXDEF_COLUMNS_RE = re.compile(r'\bUSING\s+\w+\s+\(([^)]*)\)(.*)$', re.IGNORECASE)
+
+
+def _index_columns(indexdef: str) -> Optional[Tuple[str, ...]]:
+    """Key columns of a pg_indexes.indexdef, or None for partial or unparseable indexes."""
+    match = _INDEXDEF_COLUMNS_RE.search(indexdef)
+    if not match or re.search(r'\bWHERE\b', match.group(2), re.IGNORECASE):
+        return None
+    return tuple(
+        " ".join(column.replace('"', '').split())
+        for column in match.group(1).split(',')
+    )
+
+
+async def _check_expected_indexes(pool: asyncpg.Pool) -> None:
+    """Log a warning for any expected per-user index missing from the database."""
+    tables = sorted({table for table, _ in _EXPECTED_INDEXES})
+    try:
+        rows = await fetch_with_timeout(
+            pool,
+            "SELECT tablename, indexdef FROM pg_indexes WHERE schemaname = 'public' AND tablename = ANY($1::text[])",
+            tables
+        )
+    except Exception as e:
+        logger.warning(f"Could not verify database indexes: {e}")
+        return
+    
+    present: Dict[str, List[Tuple[str, ...]]] = {}
+    for row in rows:
+        columns = _index_columns(row['indexdef'])
+        if columns:
+            present.setdefault(row['tablename'], []).append(columns)
+    
+    missing = [
+        f"{table} ({', '.join(columns)})"
+        for table, columns in _EXPECTED_INDEXES
+        if not any(found[:len(columns)] == columns for found in present.get(table, []))
+    ]
+    if missing:
+        logger.warning(
+            f"Missing database indexes: {'; '.join(missing)}. "
+            "Run 'npm run db:push' to apply the Prisma schema."
+        )
 
 
 async def get_pool() -> asyncpg.Pool:
     """Get or create the asyncpg connection pool with configuration."""
     global DB_POOL
-    if DB_POOL is None:
+    # Fast path: the pool already exists, no lock needed
+    if DB_POOL is not None:
+        return DB_POOL
+    
+    async with _POOL_LOCK:
+        if DB_POOL is not None:
+            return DB_POOL
+        
         database_url = config.get_database_url()
-        logger.info(f"Creating database connection pool to {database_url.split('@')[1] if '@' in database_url else 'database'}")
+        if logger.isEnabledFor(logging.INFO):
+            target = database_url.rsplit('@', 1)[1] if '@' in database_url else 'database'
+            logger.info("Creating database connection pool to %s", target)
         
         try:
             DB_POOL = await asyncpg.create_pool(
@@ -114,7 +303,11 @@ async def get_pool() -> asyncpg.Pool:
                 max_size=config.database.max_connections,
                 command_timeout=config.database.command_timeout
             )
-            logger.info(f"Database pool created successfully with {config.database.min_connections}-{config.database.max_connections} connections")
+            logger.info(
+                "Database pool created successfully with %d-%d connections",
+                config.database.min_connections, config.database.max_connections
+            )
+            await _check_expected_indexes(DB_POOL)
         except Exception as e:
             logger.error(f"Failed to create database pool: {e}")
             raise
@@ -126,51 +319,89 @@ async def get_pool() -> asyncpg.Pool:
 # RESOURCES (Content - what AI can READ)
 # =============================================================================
 
+# Caps how many pool connections the exact-count fallbacks may hold at once,
+# so introspection cannot starve user-facing requests of connections
+_INTROSPECTION_SEMAPHORE = asyncio.Semaphore(2)
+
+
+async def _exact_row_count(pool: asyncpg.Pool, table_name: str) -> Optional[int]:
+    """Count rows in a table exactly, returning None if the count fails."""
+    try:
+        ident = quote_identifier(table_name)
+        async with _INTROSPECTION_SEMAPHORE:
+            count_row = await fetchrow_with_timeout(pool, f'SELECT COUNT(*) AS cnt FROM {ident}')
+        return count_row["cnt"] if count_row else 0
+    except Exception:
+        return None
+
+
+async def _fetch_row_estimates(pool: asyncpg.Pool) -> Dict[str, Optional[int]]:
+    """Get approximate row counts for all public tables in one catalog query.
+    
+    Tables that have never been analyzed report reltuples = -1 and fall back
+    to an exact COUNT(*); a count of None means that fallback failed.
+    """
+    rows = await fetch_with_timeout(
+        pool,
+        "SELECT c.relname, c.reltuples::bigint AS cnt FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname='public' AND c.relkind='r' ORDER BY c.relname"
+    )
+    
+    counts: Dict[str, Optional[int]] = {row["relname"]: row["cnt"] for row in rows}
+    
+    # Issue the exact-count fallbacks together rather than one after another
+    unanalyzed = [table_name for table_name, count in counts.items() if count < 0]
+    if unanalyzed:
+        exact_counts = await asyncio.gather(
+            *(_exact_row_count(pool, table_name) for table_name in unanalyzed)
+        )
+        counts.update(zip(unanalyzed, exact_counts))
+    
+    return counts
+
+
 @mcp.resource("database://schema")
 @handle_database_errors
 async def database_schema() -> str:
     """Get database schema information including all tables and their structure."""
+    cached = _get_cached_resource("schema", config.server.schema_cache_ttl)
+    if cached is not None:
+        track_conversation_topic("database_schema")
+        return cached
+    
     pool = await get_pool()
     
-    # Get all tables
-    tables = await fetch_with_timeout(
-        pool,
-        "SELECT table_name FROM information_schema.tables "
-        "WHERE table_schema='public' ORDER BY table_name"
+    # Get every column of every public table and the row estimates concurrently
+    columns, row_counts = await asyncio.gather(
+        fetch_with_timeout(
+            pool,
+            "SELECT table_name, column_name, data_type, is_nullable FROM information_schema.columns "
+            "WHERE table_schema='public' ORDER BY table_name, ordinal_position"
+        ),
+        _fetch_row_estimates(pool),
     )
     
-    if not tables:
+    if not columns:
         return "No tables found in database."
     
-    result = "# Database Schema\n\n"
+    parts = ["# Database Schema\n\n"]
     
-    for table_row in tables:
-        table_name = table_row["table_name"]
-        result += f"## Table: {table_name}\n\n"
-        
-        # Get columns for this table
-        columns = await fetch_with_timeout(
-            pool,
-            "SELECT column_name, data_type, is_nullable FROM information_schema.columns "
-            "WHERE table_name=$1 ORDER BY ordinal_position",
-            table_name,
+    for table_name, table_columns in groupby(columns, key=itemgetter("table_name")):
+        parts.append(
+            f"## Table: {table_name}\n\n"
+            "| Column | Type | Nullable |\n"
+            "|--------|------|----------|\n"
         )
+        for col in table_columns:
+            nullable = "Yes" if col['is_nullable'] == 'YES' else "No"
+            parts.append(f"| {col['column_name']} | {col['data_type']} | {nullable} |\n")
         
-        if columns:
-            result += "| Column | Type | Nullable |\n"
-            result += "|--------|------|----------|\n"
-            for col in columns:
-                nullable = "Yes" if col['is_nullable'] == 'YES' else "No"
-                result += f"| {col['column_name']} | {col['data_type']} | {nullable} |\n"
-        
-        # Get row count
-        try:
-            ident = _quote_ident(table_name)
-            count_row = await fetchrow_with_timeout(pool, f'SELECT COUNT(*) AS cnt FROM {ident}')
-            count = count_row["cnt"] if count_row else 0
-            result += f"\n**Rows:** {count}\n\n"
-        except Exception:
-            result += "\n**Rows:** Error counting\n\n"
+        count = row_counts.get(table_name)
+        parts.append(f"\n**Rows (approx.):** {count if count is not None else 'Unknown'}\n\n")
+    
+    result = "".join(parts)
+    _cache_resource("schema", result)
     
     track_conversation_topic("database_schema")
     return result
@@ -182,39 +413,47 @@ async def user_profile(user_id: str) -> str:
     """Get a user's complete profile and information."""
     pool = await get_pool()
     
-    # Get user details
+    # Get user details; the column order matches the unpacking below
     user_row = await fetchrow_with_timeout(
         pool,
-        'SELECT * FROM "Users" WHERE id=$1',
+        '''SELECT name, email, id, age, gender, "trainingLevel", goals, "yearsRunning",
+                  "weeklyMileage", "defaultDistanceUnit", "createdAt"
+           FROM "Users" WHERE id=$1''',
         user_id,
     )
     
     if not user_row:
         return f"User {user_id} not found."
     
-    result = f"# User Profile: {user_row['name']}\n\n"
-    result += f"**Email:** {user_row['email']}\n"
-    result += f"**ID:** {user_row['id']}\n"
-    
-    if user_row.get('age'):
-        result += f"**Age:** {user_row['age']}\n"
-    if user_row.get('gender'):
-        result += f"**Gender:** {user_row['gender']}\n"
-    if user_row.get('trainingLevel'):
-        result += f"**Training Level:** {user_row['trainingLevel']}\n"
-    if user_row.get('goals'):
-        goals = ', '.join(user_row['goals']) if user_row['goals'] else 'None set'
-        result += f"**Goals:** {goals}\n"
-    if user_row.get('yearsRunning'):
-        result += f"**Years Running:** {user_row['yearsRunning']}\n"
-    if user_row.get('weeklyMileage'):
-        result += f"**Weekly Mileage:** {user_row['weeklyMileage']}\n"
-    
-    result += f"**Default Distance Unit:** {user_row.get('defaultDistanceUnit', 'miles')}\n"
-    result += f"**Member Since:** {user_row['createdAt'].strftime('%Y-%m-%d')}\n"
+    (name, email, row_id, age, gender, training_level, goals, years_running,
+     weekly_mileage, default_unit, created_at) = user_row
+    
+    parts = [
+        f"# User Profile: {name}\n\n",
+        f"**Email:** {email}\n",
+        f"**ID:** {row_id}\n",
+    ]
+    
+    if age:
+        parts.append(f"**Age:** {age}\n")
+    if gender:
+        parts.append(f"**Gender:** {gender}\n")
+    if training_level:
+        parts.append(f"**Training Level:** {training_level}\n")
+    if goals:
+        parts.append(f"**Goals:** {', '.join(goals)}\n")
+    if years_running:
+        parts.append(f"**Years Running:** {years_running}\n")
+    if weekly_mileage:
+        parts.append(f"**Weekly Mileage:** {weekly_mileage}\n")
+    
+    parts.append(
+        f"**Default Distance Unit:** {default_unit or 'miles'}\n"
+        f"**Member Since:** {created_at:%Y-%m-%d}\n"
+    )
     
     track_conversation_topic("user_profile")
-    return result
+    return "".join(parts)
 
 
 @mcp.resource("user://profile")
@@ -232,20 +471,22 @@ async def current_user_profile() -> str:
     
     try:
         # Use secure data access to get only current user's profile
-        user_data = await secure_db.get_user_profile(pool, current_user_id)
+        user_data = await _get_user_profile(pool, current_user_id)
         
         if not user_data:
             return "❌ User profile not found."
         
         # Format profile information
-        result = "# Your Profile\n\n"
-        result += f"**Name:** {user_data['name']}\n"
-        result += f"**Email:** {user_data['email']}\n"
-        result += f"**Training Level:** {user_data.get('trainingLevel', 'Not set')}\n"
-        result += f"**Preferred Distance Unit:** {user_data.get('defaultDistanceUnit', 'miles')}\n"
-        result += f"**Member Since:** {user_data['createdAt'].strftime('%Y-%m-%d')}\n"
+        parts = [
+            "# Your Profile\n\n",
+            f"**Name:** {user_data['name']}\n",
+            f"**Email:** {user_data['email']}\n",
+            f"**Training Level:** {user_data['trainingLevel'] or 'Not set'}\n",
+            f"**Preferred Distance Unit:** {user_data['defaultDistanceUnit'] or 'miles'}\n",
+            f"**Member Since:** {user_data['createdAt']:%Y-%m-%d}\n",
+        ]
         
-        return result
+        return "".join(parts)
         
     except DataAccessViolationError as e:
         return str(e)
@@ -257,6 +498,32 @@ async def current_user_profile() -> str:
 # This violates privacy and data isolation principles
 
 
+def _append_run_sections(parts: list, runs_data, start: int = 1) -> None:
+    """Append one Markdown section per run, numbering from start.
+    
+    Distances arrive already converted to the user's preferred unit.
+    """
+    for i, row in enumerate(runs_data, start):
+        date_str = row['date'].date().isoformat()
+        
+        parts.append(
+            f"## Run {i}: {date_str}\n"
+            f"- **Distance:** {row['distance']} {row['distanceUnit']}\n"
+            f"- **Duration:** {row['duration']}\n"
+        )
+        
+        if row['pace']:
+            parts.append(f"- **Pace:** {row['pace']}\n")
+        if row['name']:
+            parts.append(f"- **Name:** {row['name']}\n")
+        if row['elevationGain']:
+            parts.append(f"- **Elevation Gain:** {row['elevationGain']}\n")
+        if row['notes']:
+            parts.append(f"- **Notes:** {row['notes']}\n")
+        
+        parts.append("\n")
+
+
 @mcp.resource("runs://user/{user_id}/recent")
 @handle_database_errors
 async def user_recent_runs(user_id: str) -> str:
@@ -264,52 +531,73 @@ async def user_recent_runs(user_id: str) -> str:
     track_conversation_topic("runs")
     
     try:
-        # Use secure data access to enforce user isolation
+        # Use secure data access to enforce user isolation; the runs and
+        # profile lookups are independent, so issue them concurrently
         pool = await get_pool()
-        runs_data = await secure_db.get_user_runs(pool, user_id, get_user_max_results())
+        runs_data, user_profile = await asyncio.gather(
+            secure_db.get_user_runs(pool, user_id, get_user_max_results(), get_user_distance_unit()),
+            _get_user_profile(pool, user_id),
+        )
         
         if not runs_data:
             return "No runs found for this user."
         
-        # Get user name securely
-        user_profile = await secure_db.get_user_profile(pool, user_id)
         user_name = user_profile['name'] if user_profile else "User"
         
-        result = f"# Recent Runs for {user_name}\n\n"
-        result += f"Showing {len(runs_data)} most recent runs:\n\n"
+        parts = [
+            f"# Recent Runs for {user_name}\n\n",
+            f"Showing {len(runs_data)} most recent runs:\n\n",
+        ]
+        _append_run_sections(parts, runs_data)
         
-        preferred_unit = get_user_distance_unit()
+        return "".join(parts)
         
-        for i, row in enumerate(runs_data, 1):
-            date_str = row['date'].date().strftime('%Y-%m-%d')
-            distance = row['distance']
-            unit = row['distanceUnit']
-            
-            # Convert units if user has a preference and it's different
-            if preferred_unit and preferred_unit != unit:
-                if preferred_unit == "kilometers" and unit == "miles":
-                    distance = round(distance * 1.60934, 2)
-                    unit = "kilometers"
-                elif preferred_unit == "miles" and unit == "kilometers":
-                    distance = round(distance / 1.60934, 2)
-                    unit = "miles"
-            
-            result += f"## Run {i}: {date_str}\n"
-            result += f"- **Distance:** {distance} {unit}\n"
-            result += f"- **Duration:** {row['duration']}\n"
-            
-            if row.get('pace'):
-                result += f"- **Pace:** {row['pace']}\n"
-            if row.get('name'):
-                result += f"- **Name:** {row['name']}\n"
-            if row.get('elevationGain'):
-                result += f"- **Elevation Gain:** {row['elevationGain']}\n"
-            if row.get('notes'):
-                result += f"- **Notes:** {row['notes']}\n"
-            
-            result += "\n"
+    except DataAccessViolationError as e:
+        return str(e)
+    except Exception as e:
+        return f"❌ Error retrieving runs: {str(e)}"
+
+
+@mcp.resource("runs://user/{user_id}/recent/{page}")
+@handle_database_errors
+async def user_recent_runs_page(user_id: str, page: str) -> str:
+    """Get one page of a user's runs, newest first - SECURE VERSION.
+    
+    Pages hold the user's max-results setting worth of runs and start at 1,
+    so long histories can be read without rendering every run at once.
+    """
+    track_conversation_topic("runs")
+    
+    try:
+        page_num = int(page)
+    except ValueError:
+        page_num = 0
+    if page_num < 1:
+        return f"❌ Invalid page '{page}'. Pages start at 1."
+    
+    try:
+        page_size = get_user_max_results()
+        pool = await get_pool()
+        # Fetch one extra row to learn whether another page follows
+        runs_data, user_profile = await asyncio.gather(
+            secure_db.get_user_runs(pool, user_id, page_size + 1, get_user_distance_unit(),
+                                    offset=(page_num - 1) * page_size),
+            _get_user_profile(pool, user_id),
+        )
+        
+        if not runs_data:
+            return f"No runs found for this user on page {page_num}."
+        
+        user_name = user_profile['name'] if user_profile else "User"
+        has_next = len(runs_data) > page_size
+        runs_data = runs_data[:page_size]
         
-        return result
+        parts = [f"# Runs for {user_name} (page {page_num})\n\n"]
+        _append_run_sections(parts, runs_data, start=(page_num - 1) * page_size + 1)
+        if has_next:
+            parts.append(f"**Next page:** runs://user/{user_id}/recent/{page_num + 1}\n")
+        
+        return "".join(parts)
         
     except DataAccessViolationError as e:
         return str(e)
@@ -317,6 +605,20 @@ async def user_recent_runs(user_id: str) -> str:
         return f"❌ Error retrieving runs: {str(e)}"
 
 
+_PERIOD_RE = re.compile(r'^([1-9]\d*)([dwmy])$')
+_PERIOD_DAYS = {'d': 1, 'w': 7, 'm': 30, 'y': 365}
+
+
+@lru_cache(maxsize=64)
+def _parse_period_days(period: str) -> int:
+    """Convert a period such as "30d", "4w", "6m" or "1y" to days, defaulting to 30."""
+    match = _PERIOD_RE.match(period)
+    if not match:
+        return 30
+    count, unit = match.groups()
+    return int(count) * _PERIOD_DAYS[unit]
+
+
 @mcp.resource("runs://user/{user_id}/summary/{period}")
 @handle_database_errors
 async def user_run_summary(user_id: str, period: str = "30d") -> str:
@@ -324,63 +626,74 @@ async def user_run_summary(user_id: str, period: str = "30d") -> str:
     track_conversation_topic("run_summary")
     
     try:
-        # Parse period (30d, 7d, 90d, etc.)
-        if period.endswith('d'):
-            days = int(period[:-1])
-        else:
-            days = 30  # default
-        
-        pool = await get_pool()
-        
-        # Use secure data access to get user profile
-        user_profile = await secure_db.get_user_profile(pool, user_id)
-        if not user_profile:
-            return "❌ User not found."
-        
-        user_name = user_profile['name']
-        preferred_unit = user_profile.get('defaultDistanceUnit', 'miles')
+        days = _parse_period_days(period)
         
-        # Get run statistics with secure query
+        # Check access before scheduling any queries
         current_user = get_current_user_id()
         if current_user != user_id:
             raise DataAccessViolationError("🔒 Access denied: Can only access your own data")
         
+        pool = await get_pool()
+        
+        # One round trip: the user's name and unit plus run statistics
+        # already converted to that unit
         stats_query = '''
             SELECT 
-                COUNT(*) as run_count,
-                SUM(distance) as total_distance,
-                AVG(distance) as avg_distance,
-                MIN(distance) as min_distance,
-                MAX(distance) as max_distance
-            FROM "Runs" 
-            WHERE "userId"=$1 AND date >= NOW() - INTERVAL '%s days'
+                u.name,
+                u.unit,
+                COUNT(r.distance) as run_count,
+                SUM(r.distance) as total_distance,
+                AVG(r.distance) as avg_distance,
+                MIN(r.distance) as min_distance,
+                MAX(r.distance) as max_distance
+            FROM (
+                SELECT id, name, COALESCE("defaultDistanceUnit"::text, 'miles') AS unit
+                FROM "Users" WHERE id=$1
+            ) u
+            LEFT JOIN LATERAL (
+                SELECT CASE
+                           WHEN "distanceUnit"::text = 'miles' AND u.unit = 'kilometers' THEN distance * 1.60934
+                           WHEN "distanceUnit"::text = 'kilometers' AND u.unit = 'miles' THEN distance / 1.60934
+                           ELSE distance
+                       END AS distance
+                FROM "Runs"
+                WHERE "userId"=u.id AND date >= NOW() - make_interval(days => $2)
+            ) r ON true
+            GROUP BY u.name, u.unit
         '''
         
-        stats_row = await secure_db.secure_fetchrow(
-            pool, stats_query, user_id, days, table_name="Runs"
-        )
+        stats_row = await secure_db.secure_fetchrow(pool, stats_query, user_id, days, table_name="Runs")
         
-        if not stats_row or stats_row['run_count'] == 0:
+        if not stats_row:
+            return "❌ User not found."
+        
+        user_name = stats_row['name']
+        preferred_unit = stats_row['unit']
+        
+        if stats_row['run_count'] == 0:
             return f"No runs found for {user_name} in the last {days} days."
         
-        result = f"# Running Summary for {user_name}\n"
-        result += f"**Period:** Last {days} days\n\n"
+        parts = [
+            f"# Running Summary for {user_name}\n",
+            f"**Period:** Last {days} days\n\n",
+        ]
         
-        # Convert distances to preferred unit if needed
         total_dist = float(stats_row['total_distance'] or 0)
         avg_dist = float(stats_row['avg_distance'] or 0)
         min_dist = float(stats_row['min_distance'] or 0)
         max_dist = float(stats_row['max_distance'] or 0)
         
-        result += "## Summary Statistics\n"
-        result += f"- **Total Runs:** {stats_row['run_count']}\n"
-        result += f"- **Total Distance:** {total_dist:.2f} {preferred_unit}\n"
-        result += f"- **Average Distance:** {avg_dist:.2f} {preferred_unit}\n"
-        result += f"- **Shortest Run:** {min_dist:.2f} {preferred_unit}\n"
-        result += f"- **Longest Run:** {max_dist:.2f} {preferred_unit}\n"
-        result += f"- **Runs per Week:** {(stats_row['run_count'] * 7 / days):.1f}\n"
+        parts.append(
+            "## Summary Statistics\n"
+            f"- **Total Runs:** {stats_row['run_count']}\n"
+            f"- **Total Distance:** {total_dist:.2f} {preferred_unit}\n"
+            f"- **Average Distance:** {avg_dist:.2f} {preferred_unit}\n"
+            f"- **Shortest Run:** {min_dist:.2f} {preferred_unit}\n"
+            f"- **Longest Run:** {max_dist:.2f} {preferred_unit}\n"
+            f"- **Runs per Week:** {(stats_row['run_count'] * 7 / days):.1f}\n"
+        )
         
-        return result
+        return "".join(parts)
         
     except DataAccessViolationError as e:
         return str(e)
@@ -397,45 +710,52 @@ async def user_shoes(user_id: str) -> str:
     try:
         pool = await get_pool()
         
-        # Use secure data access to get user profile and shoes
-        user_profile = await secure_db.get_user_profile(pool, user_id)
+        # Use secure data access to get user profile and shoes concurrently
+        user_profile, shoes_data = await asyncio.gather(
+            _get_user_profile(pool, user_id),
+            secure_db.get_user_shoes(pool, user_id),
+        )
         if not user_profile:
             return "❌ User not found."
         
         user_name = user_profile['name']
         
-        # Get shoes using secure method
-        shoes_data = await secure_db.get_user_shoes(pool, user_id)
-        
         if not shoes_data:
             return f"No shoes found for {user_name}."
         
-        result = f"# Shoe Collection for {user_name}\n\n"
+        parts = [f"# Shoe Collection for {user_name}\n\n"]
         
-        active_shoes = [shoe for shoe in shoes_data if not shoe['retired']]
-        retired_shoes = [shoe for shoe in shoes_data if shoe['retired']]
-        
-        if active_shoes:
-            result += f"## Active Shoes ({len(active_shoes)})\n\n"
-            for shoe in active_shoes:
-                current = shoe['currentDistance']
-                max_dist = shoe['maxDistance']
-                unit = shoe['distanceUnit']
-                percentage = (current / max_dist * 100) if max_dist > 0 else 0
-                
-                result += f"### {shoe['name']}\n"
-                result += f"- **Usage:** {current}/{max_dist} {unit} ({percentage:.1f}%)\n"
-                result += f"- **Added:** {shoe['createdAt'].strftime('%Y-%m-%d')}\n"
-                if shoe.get('notes'):
-                    result += f"- **Notes:** {shoe['notes']}\n"
-                result += "\n"
-        
-        if retired_shoes:
-            result += f"## Retired Shoes ({len(retired_shoes)})\n\n"
-            for shoe in retired_shoes:
-                result += f"- **{shoe['name']}** (retired)\n"
+        # Rows arrive active-first with per-group counts, so a single pass
+        # only needs to emit a header when the retired flag changes
+        current_group = None
+        for shoe in shoes_data:
+            retired = shoe['retired']
+            if retired != current_group:
+                current_group = retired
+                if retired:
+                    parts.append(f"## Retired Shoes ({shoe['retired_count']})\n\n")
+                else:
+                    parts.append(f"## Active Shoes ({shoe['active_count']})\n\n")
+            
+            if retired:
+                parts.append(f"- **{shoe['name']}** (retired)\n")
+                continue
+            
+            current = shoe['currentDistance']
+            max_dist = shoe['maxDistance']
+            unit = shoe['distanceUnit']
+            percentage = (current / max_dist * 100) if max_dist > 0 else 0
+            
+            parts.append(
+                f"### {shoe['name']}\n"
+                f"- **Usage:** {current}/{max_dist} {unit} ({percentage:.1f}%)\n"
+                f"- **Added:** {shoe['createdAt']:%Y-%m-%d}\n"
+            )
+            if shoe['notes']:
+                parts.append(f"- **Notes:** {shoe['notes']}\n")
+            parts.append("\n")
         
-        return result
+        return "".join(parts)
         
     except DataAccessViolationError as e:
         return str(e)
@@ -447,37 +767,36 @@ async def user_shoes(user_id: str) -> str:
 @handle_database_errors
 async def database_stats() -> str:
     """Get database statistics and row counts for all tables."""
+    cached = _get_cached_resource("stats", config.server.stats_cache_ttl)
+    if cached is not None:
+        track_conversation_topic("database_stats")
+        return cached
+    
     pool = await get_pool()
     
-    # Get all tables
-    tables = await fetch_with_timeout(
-        pool,
-        "SELECT table_name FROM information_schema.tables "
-        "WHERE table_schema='public' ORDER BY table_name"
-    )
+    row_counts = await _fetch_row_estimates(pool)
     
-    if not tables:
+    if not row_counts:
         return "No tables found in database."
     
-    result = "# Database Statistics\n\n"
-    result += "| Table | Row Count |\n"
-    result += "|-------|----------|\n"
+    parts = [
+        "# Database Statistics\n\n",
+        "| Table | Row Count |\n",
+        "|-------|----------|\n",
+    ]
     
     total_rows = 0
-    for table_row in tables:
-        table_name = table_row["table_name"]
-        try:
-            ident = _quote_ident(table_name)
-            count_row = await fetchrow_with_timeout(
-                pool, f'SELECT COUNT(*) AS cnt FROM {ident}'
-            )
-            count = count_row["cnt"] if count_row else 0
-            total_rows += count
-            result += f"| {table_name} | {count:,} |\n"
-        except Exception:
-            result += f"| {table_name} | Error |\n"
+    for table_name, count in row_counts.items():
+        if count is None:
+            parts.append(f"| {table_name} | Error |\n")
+            continue
+        total_rows += count
+        parts.append(f"| {table_name} | {count:,} |\n")
+    
+    parts.append(f"\n**Total Rows:** {total_rows:,}\n")
     
-    result += f"\n**Total Rows:** {total_rows:,}\n"
+    result = "".join(parts)
+    _cache_resource("stats", result)
     
     track_conversation_topic("database_stats")
     return result
@@ -487,6 +806,21 @@ async def database_stats() -> str:
 # TOOLS (Actions - what AI can do)
 # =============================================================================
 
+def _register_tool(impl: Callable[..., Awaitable[str]], action: str) -> Callable[..., Awaitable[str]]:
+    """Register a ``*_tool`` implementation as an MCP tool that tracks ``action``.
+    
+    The tool takes the implementation's name without the ``_tool`` suffix and
+    keeps its signature and docstring, which FastMCP uses for the schema.
+    """
+    @wraps(impl)
+    async def tool(*args, **kwargs) -> str:
+        track_last_action(action)
+        return await impl(*args, **kwargs)
+    
+    tool.__name__ = tool.__qualname__ = impl.__name__.removesuffix("_tool")
+    return mcp.tool()(tool)
+
+
 @mcp.tool()
 @handle_database_errors
 async def add_user(name: str, email: str) -> str:
@@ -508,6 +842,7 @@ async def add_user(name: str, email: str) -> str:
         email,
     )
     
+    _invalidate_resource_cache()
     track_last_action("add_user")
     return f"✅ Created user '{name}' with ID: {user_id}"
 
@@ -530,9 +865,11 @@ async def update_user_email(user_id: str, email: str) -> str:
         user_id,
     )
     
-    if result.endswith("0"):
+    if _affected(result) == 0:
         return f"❌ User {user_id} not found."
     
+    invalidate_user_profile(user_id)
+    _invalidate_resource_cache()
     track_last_action("update_user_email")
     return f"✅ Updated email for user {user_id} to {email}"
 
@@ -553,13 +890,30 @@ async def delete_user(user_id: str) -> str:
         user_id
     )
     
-    if result.endswith("0"):
+    if _affected(result) == 0:
         return f"❌ User {user_id} not found."
     
+    invalidate_user_profile(user_id)
+    _invalidate_resource_cache()
     track_last_action("delete_user")
     return f"✅ Deleted user {user_id}"
 
 
+# Optional columns are nullable with no defaults, so the inserts always bind them
+# (None -> NULL). A single statement per table keeps asyncpg's statement cache warm.
+_INSERT_RUN_QUERY = (
+    'INSERT INTO "Runs" (id, date, duration, distance, "distanceUnit", "updatedAt", "userId", '
+    'name, notes, "trainingEnvironment", pace, "elevationGain", "shoeId") '
+    'VALUES ($1, $2, $3, $4, $5, NOW(), $6, $7, $8, $9, $10, $11, $12)'
+)
+
+_INSERT_SHOE_QUERY = (
+    'INSERT INTO "Shoes" (id, name, "maxDistance", "distanceUnit", "currentDistance", retired, '
+    '"updatedAt", "userId", notes) '
+    'VALUES ($1, $2, $3, $4, $5, $6, NOW(), $7, $8)'
+)
+
+
 @mcp.tool()
 @handle_database_errors
 async def add_run(user_id: str, date: str, duration: str, distance: float,
@@ -584,54 +938,13 @@ async def add_run(user_id: str, date: str, duration: str, distance: float,
     pool = await get_pool()
     run_id = str(uuid.uuid4())
     
-    # Base fields that are always included
-    fields = ['id', 'date', 'duration', 'distance', '"distanceUnit"', '"updatedAt"', '"userId"']
-    values = [run_id, date, duration, distance, distance_unit, user_id]
-    placeholders = ['$1', '$2', '$3', '$4', '$5', 'NOW()', '$6']
-    
-    # Add optional fields if provided
-    param_count = 7
-    
-    if name is not None:
-        fields.append('name')
-        values.append(name)
-        placeholders.append(f'${param_count}')
-        param_count += 1
-        
-    if notes is not None:
-        fields.append('notes')
-        values.append(notes)
-        placeholders.append(f'${param_count}')
-        param_count += 1
-        
-    if training_environment is not None:
-        fields.append('"trainingEnvironment"')
-        values.append(training_environment)
-        placeholders.append(f'${param_count}')
-        param_count += 1
-        
-    if pace is not None:
-        fields.append('pace')
-        values.append(pace)
-        placeholders.append(f'${param_count}')
-        param_count += 1
-        
-    if elevation_gain is not None:
-        fields.append('"elevationGain"')
-        values.append(elevation_gain)
-        placeholders.append(f'${param_count}')
-        param_count += 1
-        
-    if shoe_id is not None:
-        fields.append('"shoeId"')
-        values.append(shoe_id)
-        placeholders.append(f'${param_count}')
-        param_count += 1
-    
-    query = f'INSERT INTO "Runs" ({", ".join(fields)}) VALUES ({", ".join(placeholders)})'
-    
-    await execute_with_timeout(pool, query, *values)
+    await execute_with_timeout(
+        pool, _INSERT_RUN_QUERY, run_id, date, duration, distance, distance_unit, user_id,
+        name, notes, training_environment, pace, elevation_gain, shoe_id
+    )
     
+    invalidate_user_data(user_id)
+    _invalidate_resource_cache()
     track_last_action("add_run")
     return f"✅ Added run for user {user_id} with ID: {run_id}"
 
@@ -655,21 +968,13 @@ async def add_shoe(user_id: str, name: str, max_distance: float,
     pool = await get_pool()
     shoe_id = str(uuid.uuid4())
     
-    # Base fields
-    fields = ['id', 'name', '"maxDistance"', '"distanceUnit"', '"currentDistance"', 'retired', '"updatedAt"', '"userId"']
-    values = [shoe_id, name, max_distance, distance_unit, current_distance, retired, user_id]
-    placeholders = ['$1', '$2', '$3', '$4', '$5', '$6', 'NOW()', '$7']
-    
-    # Add optional notes
-    if notes:
-        fields.append('notes')
-        values.append(notes)
-        placeholders.append('$8')
-    
-    query = f'INSERT INTO "Shoes" ({", ".join(fields)}) VALUES ({", ".join(placeholders)})'
-    
-    await execute_with_timeout(pool, query, *values)
+    await execute_with_timeout(
+        pool, _INSERT_SHOE_QUERY, shoe_id, name, max_distance, distance_unit,
+        current_distance, retired, user_id, notes or None
+    )
     
+    invalidate_user_data(user_id)
+    _invalidate_resource_cache()
     track_last_action("add_shoe")
     return f"✅ Added shoe '{name}' for user {user_id} with ID: {shoe_id}"
 
@@ -802,6 +1107,7 @@ async def get_session_history(user_id: str = "", limit: int = 10) -> str:
         if not user_id:
             return "❌ No user context set and no user_id provided."
     
+    limit = max(1, min(limit, MAX_RESULTS_PER_QUERY))
     pool = await get_pool()
     
     # Get user name
@@ -831,60 +1137,34 @@ async def get_session_history(user_id: str = "", limit: int = 10) -> str:
     if not rows:
         return f"📭 No session history found for {user_name}."
     
-    result = f"📜 **Session History for {user_name}**\\n\\n"
+    parts = [f"📜 **Session History for {user_name}**\n\n"]
     
+    # One formatted block per session (adjacent f-strings compile to a
+    # single string build)
     for i, row in enumerate(rows, 1):
-        session_id = row['sessionId'][-20:]  # Last 20 chars
-        created = row['createdAt'].strftime('%Y-%m-%d %H:%M UTC')
-        last_activity = row['lastActivity'].strftime('%Y-%m-%d %H:%M UTC')
-        expires = row['expiresAt'].strftime('%Y-%m-%d %H:%M UTC')
-        status = "🟢 Active" if row['active'] else "🔴 Inactive"
-        
-        duration = row['lastActivity'] - row['createdAt']
-        duration_str = f"{duration.total_seconds() / 60:.0f} minutes"
-        
-        result += f"**Session {i}:** ...{session_id}\\n"
-        result += f"• Status: {status}\\n"
-        result += f"• Created: {created}\\n"
-        result += f"• Last Activity: {last_activity}\\n"
-        result += f"• Duration: {duration_str}\\n"
-        result += f"• Expires: {expires}\\n\\n"
+        created = row['createdAt']
+        last_activity = row['lastActivity']
+        parts.append(
+            f"**Session {i}:** ...{row['sessionId'][-20:]}\n"
+            f"• Status: {'🟢 Active' if row['active'] else '🔴 Inactive'}\n"
+            f"• Created: {created:%Y-%m-%d %H:%M} UTC\n"
+            f"• Last Activity: {last_activity:%Y-%m-%d %H:%M} UTC\n"
+            f"• Duration: {(last_activity - created).total_seconds() / 60:.0f} minutes\n"
+            f"• Expires: {row['expiresAt']:%Y-%m-%d %H:%M} UTC\n\n"
+        )
     
     track_last_action("get_session_history")
-    return result
+    return "".join(parts)
 
 
 # =============================================================================
 # SMART USER CONTEXT TOOLS
 # =============================================================================
 
-@mcp.tool()
-async def get_smart_user_context() -> str:
-    """Get comprehensive, intelligent user context for personalized responses."""
-    track_last_action("get_smart_context")
-    return await get_smart_user_context_tool()
-
-
-@mcp.tool()
-async def analyze_user_patterns() -> str:
-    """Analyze user patterns and provide insights about their running journey."""
-    track_last_action("analyze_patterns")
-    return await analyze_user_patterns_tool()
-
-
-@mcp.tool()
-async def get_motivational_context() -> str:
-    """Get motivational context to help provide encouraging responses."""
-    track_last_action("get_motivational_context")
-    return await get_motivational_context_tool()
-
-
-@mcp.tool()
-async def update_conversation_intelligence(user_message: str, ai_response: str, 
-                                         intent: str = "general", sentiment: str = "neutral") -> str:
-    """Update conversation intelligence with rich context from the current interaction."""
-    track_last_action("update_conversation_intelligence")
-    return await update_conversation_intelligence_tool(user_message, ai_response, intent, sentiment)
+get_smart_user_context = _register_tool(get_smart_user_context_tool, "get_smart_context")
+analyze_user_patterns = _register_tool(analyze_user_patterns_tool, "analyze_patterns")
+get_motivational_context = _register_tool(get_motivational_context_tool, "get_motivational_context")
+update_conversation_intelligence = _register_tool(update_conversation_intelligence_tool, "update_conversation_intelligence")
 
 
 @mcp.tool()
@@ -895,6 +1175,9 @@ async def get_user_runs(limit: int = 5) -> str:
     if not user_id:
         return "❌ No user context set. Use set_current_user first."
     
+    # Bound the free-form limit the same way as the max-results preference
+    limit = max(1, min(limit, MAX_RESULTS_PER_QUERY))
+    
     pool = await get_pool()
     
     # Get user's distance unit preference
@@ -903,7 +1186,8 @@ async def get_user_runs(limit: int = 5) -> str:
     # Get recent runs
     runs = await fetch_with_timeout(
         pool,
-        'SELECT * FROM "Runs" WHERE "userId"=$1 ORDER BY date DESC LIMIT $2',
+        '''SELECT date, distance, duration, pace, name, notes, "elevationGain"
+           FROM "Runs" WHERE "userId"=$1 ORDER BY date DESC LIMIT $2''',
         user_id,
         limit
     )
@@ -911,29 +1195,27 @@ async def get_user_runs(limit: int = 5) -> str:
     if not runs:
         return "📊 No runs found for this user."
     
-    result = f"🏃 **Recent Runs ({len(runs)} of {limit} requested)**\n\n"
+    parts = [f"🏃 **Recent Runs ({len(runs)} of {limit} requested)**\n\n"]
     
     for i, run in enumerate(runs, 1):
-        date = run.get('date', 'Unknown date')
-        distance = run.get('distance', 0)
-        duration = run.get('duration', 'Unknown')
-        pace = run.get('pace', 'Unknown')
-        name = run.get('name', f'Run {i}')
-        notes = run.get('notes', '')
-        elevation = run.get('elevationGain', 0)
+        date, distance, duration, pace, name, notes, elevation = run
+        name = name or f'Run {i}'
+        pace = pace or 'Unknown'
         
-        result += f"**{i}. {name}** ({date})\n"
-        result += f"• Distance: {distance} {distance_unit}\n"
-        result += f"• Duration: {duration}\n"
-        result += f"• Pace: {pace}\n"
+        parts.append(
+            f"**{i}. {name}** ({date})\n"
+            f"• Distance: {distance} {distance_unit}\n"
+            f"• Duration: {duration}\n"
+            f"• Pace: {pace}\n"
+        )
         if elevation:
-            result += f"• Elevation: {elevation}ft\n"
+            parts.append(f"• Elevation: {elevation}ft\n")
         if notes:
-            result += f"• Notes: {notes}\n"
-        result += "\n"
+            parts.append(f"• Notes: {notes}\n")
+        parts.append("\n")
     
     track_last_action("get_user_runs")
-    return result
+    return "".join(parts)
 
 
 @mcp.tool()
@@ -944,6 +1226,9 @@ async def get_user_shoes(limit: int = 10) -> str:
     if not user_id:
         return "❌ No user context set. Use set_current_user first."
     
+    # Bound the free-form limit the same way as the max-results preference
+    limit = max(1, min(limit, MAX_RESULTS_PER_QUERY))
+    
     pool = await get_pool()
     
     # Get user's distance unit preference
@@ -952,7 +1237,8 @@ async def get_user_shoes(limit: int = 10) -> str:
     # Get user's shoes
     shoes = await fetch_with_timeout(
         pool,
-        'SELECT * FROM "Shoes" WHERE "userId"=$1 ORDER BY "createdAt" DESC LIMIT $2',
+        '''SELECT name, "currentDistance", "maxDistance", notes, retired
+           FROM "Shoes" WHERE "userId"=$1 ORDER BY "createdAt" DESC LIMIT $2''',
         user_id,
         limit
     )
@@ -960,490 +1246,265 @@ async def get_user_shoes(limit: int = 10) -> str:
     if not shoes:
         return "👟 No shoes found for this user."
     
-    result = f"👟 **Shoe Collection ({len(shoes)} shoes)**\n\n"
+    parts = [f"👟 **Shoe Collection ({len(shoes)} shoes)**\n\n"]
     
     for i, shoe in enumerate(shoes, 1):
-        name = shoe.get('name', f'Shoe {i}')
-        current_distance = shoe.get('currentDistance', 0)
-        max_distance = shoe.get('maxDistance', 0)
-        notes = shoe.get('notes', '')
-        retired = shoe.get('retired', False)
+        name, current_distance, max_distance, notes, retired = shoe
         
         # Calculate usage percentage
         usage_pct = (current_distance / max_distance * 100) if max_distance > 0 else 0
         status = "🚫 RETIRED" if retired else f"{usage_pct:.0f}% used"
         
-        result += f"**{i}. {name}** ({status})\n"
-        result += f"• Mileage: {current_distance}/{max_distance} {distance_unit}\n"
+        parts.append(
+            f"**{i}. {name}** ({status})\n"
+            f"• Mileage: {current_distance}/{max_distance} {distance_unit}\n"
+        )
         if notes:
-            result += f"• Notes: {notes}\n"
-        result += "\n"
+            parts.append(f"• Notes: {notes}\n")
+        parts.append("\n")
     
     track_last_action("get_user_shoes")
-    return result
+    return "".join(parts)
 
 
 # =============================================================================
 # ADVANCED TRAINING & ANALYTICS TOOLS  
 # =============================================================================
 
-@mcp.tool()
-async def generate_training_plan(goal_type: str, target_distance: float, 
-                               target_time: str = None, weeks: int = 12,
-                               distance_unit: str = "miles") -> str:
-    """Generate an intelligent training plan based on user's current fitness and goals.
-    
-    Args:
-        goal_type: Type of goal ('race', 'distance', 'speed', 'endurance')
-        target_distance: Target distance for the goal
-        target_time: Optional target time (HH:MM:SS format)
-        weeks: Number of weeks for the plan (default: 12)
-        distance_unit: 'miles' or 'kilometers'
-    """
-    track_last_action("generate_training_plan")
-    return await generate_training_plan_tool(goal_type, target_distance, target_time, weeks, distance_unit)
-
-
-@mcp.tool()
-async def get_active_training_plan() -> str:
-    """Get the current active training plan with progress tracking."""
-    track_last_action("get_training_plan")
-    return await get_active_training_plan_tool()
-
-
-@mcp.tool()
-async def set_running_goal(goal_type: str, target_value: float, 
-                          target_date: str = None, description: str = None) -> str:
-    """Set a specific running goal with tracking.
-    
-    Args:
-        goal_type: Type of goal ('distance_pr', 'race_time', 'weekly_mileage', 'consistency')
-        target_value: Numeric target (distance, time in minutes, etc.)
-        target_date: Optional target date (YYYY-MM-DD)
-        description: Optional description of the goal
-    """
-    track_last_action("set_goal")
-    return await set_running_goal_tool(goal_type, target_value, target_date, description)
-
-
-@mcp.tool()
-async def get_goal_progress() -> str:
-    """Get progress tracking for all active goals."""
-    track_last_action("get_goal_progress")
-    return await get_goal_progress_tool()
-
-
-@mcp.tool()
-async def get_performance_trends(period: str = "3months") -> str:
-    """Get detailed performance trends and analytics.
-    
-    Args:
-        period: Analysis period ('1month', '3months', '6months', '1year')
-    """
-    track_last_action("get_performance_trends")
-    return await get_performance_trends_tool(period)
-
-
-@mcp.tool()
-async def predict_race_time(distance: float, goal_date: str, 
-                           distance_unit: str = "miles") -> str:
-    """Predict race time based on current fitness and training.
-    
-    Args:
-        distance: Race distance
-        goal_date: Race date (YYYY-MM-DD)
-        distance_unit: 'miles' or 'kilometers'
-    """
-    track_last_action("predict_race_time")
-    return await predict_race_time_tool(distance, goal_date, distance_unit)
-
-
-@mcp.tool()
-async def get_social_feed(limit: int = 10) -> str:
-    """Get personalized social feed with posts from followed users and groups.
-    
-    Args:
-        limit: Number of posts to retrieve (default: 10)
-    """
-    track_last_action("get_social_feed")
-    return await get_social_feed_tool(limit)
-
-
-@mcp.tool()
-async def create_run_post(run_id: str, caption: str = None, 
-                         share_to_groups: str = "false") -> str:
-    """Create a social post from a run.
-    
-    Args:
-        run_id: ID of the run to share
-        caption: Optional caption for the post
-        share_to_groups: "true" to share to all joined groups
-    """
-    track_last_action("create_run_post")
-    return await create_run_post_tool(run_id, caption, share_to_groups)
+generate_training_plan = _register_tool(generate_training_plan_tool, "generate_training_plan")
+get_active_training_plan = _register_tool(get_active_training_plan_tool, "get_training_plan")
+set_running_goal = _register_tool(set_running_goal_tool, "set_goal")
+get_goal_progress = _register_tool(get_goal_progress_tool, "get_goal_progress")
+get_performance_trends = _register_tool(get_performance_trends_tool, "get_performance_trends")
+predict_race_time = _register_tool(predict_race_time_tool, "predict_race_time")
+get_social_feed = _register_tool(get_social_feed_tool, "get_social_feed")
+create_run_post = _register_tool(create_run_post_tool, "create_run_post")
 
 
 # =============================================================================
 # HEALTH & RECOVERY TOOLS
 # =============================================================================
 
-@mcp.tool()
-async def analyze_injury_risk(time_period: str = "4weeks") -> str:
-    """Analyze injury risk based on training load and patterns.
-    
-    Args:
-        time_period: Period to analyze ('2weeks', '4weeks', '8weeks', '12weeks')
-    """
-    track_last_action("analyze_injury_risk")
-    return await analyze_injury_risk_tool(time_period)
-
-
-@mcp.tool()
-async def get_recovery_recommendations(focus_area: str = "general") -> str:
-    """Get personalized recovery recommendations.
-    
-    Args:
-        focus_area: Focus area ('general', 'legs', 'aerobic', 'strength', 'flexibility')
-    """
-    track_last_action("get_recovery_recommendations")
-    return await get_recovery_recommendations_tool(focus_area)
-
-
-@mcp.tool()
-async def analyze_training_load(period: str = "4weeks") -> str:
-    """Analyze training load progression and optimization.
-    
-    Args:
-        period: Analysis period ('2weeks', '4weeks', '8weeks', '12weeks')
-    """
-    track_last_action("analyze_training_load")
-    return await analyze_training_load_tool(period)
-
-
-@mcp.tool()
-async def get_health_insights() -> str:
-    """Get comprehensive health insights based on training patterns."""
-    track_last_action("get_health_insights")
-    return await get_health_insights_tool()
+analyze_injury_risk = _register_tool(analyze_injury_risk_tool, "analyze_injury_risk")
+get_recovery_recommendations = _register_tool(get_recovery_recommendations_tool, "get_recovery_recommendations")
+analyze_training_load = _register_tool(analyze_training_load_tool, "analyze_training_load")
+get_health_insights = _register_tool(get_health_insights_tool, "get_health_insights")
 
 
 # =============================================================================
 # ROUTE & ENVIRONMENT TOOLS
 # =============================================================================
 
-@mcp.tool()
-async def analyze_environment_impact(time_period: str = "4weeks") -> str:
-    """Analyze how different training environments affect performance.
-    
-    Args:
-        time_period: Period to analyze ('2weeks', '4weeks', '8weeks', '12weeks')
-    """
-    track_last_action("analyze_environment_impact")
-    return await analyze_environment_impact_tool(time_period)
-
-
-@mcp.tool()
-async def get_route_recommendations(goal_type: str = "general", distance: float = 5.0, 
-                                  conditions: str = "any") -> str:
-    """Get intelligent route recommendations based on goals and conditions.
-    
-    Args:
-        goal_type: Type of training ('speed', 'endurance', 'recovery', 'hills', 'general')
-        distance: Target distance for the route
-        conditions: Weather/environmental conditions ('hot', 'cold', 'rainy', 'windy', 'any')
-    """
-    track_last_action("get_route_recommendations")
-    return await get_route_recommendations_tool(goal_type, distance, conditions)
-
-
-@mcp.tool()
-async def analyze_elevation_impact() -> str:
-    """Analyze how elevation affects performance and provide training recommendations."""
-    track_last_action("analyze_elevation_impact")
-    return await analyze_elevation_impact_tool()
-
-
-@mcp.tool()
-async def get_seasonal_training_advice(season: str = "current") -> str:
-    """Get seasonal training advice based on current conditions.
-    
-    Args:
-        season: Season to get advice for ('spring', 'summer', 'fall', 'winter', 'current')
-    """
-    track_last_action("get_seasonal_training_advice")
-    return await get_seasonal_training_advice_tool(season)
-
-
-@mcp.tool()
-async def optimize_training_environment() -> str:
-    """Analyze training environment patterns and suggest optimizations."""
-    track_last_action("optimize_training_environment")
-    return await optimize_training_environment_tool()
+analyze_environment_impact = _register_tool(analyze_environment_impact_tool, "analyze_environment_impact")
+get_route_recommendations = _register_tool(get_route_recommendations_tool, "get_route_recommendations")
+analyze_elevation_impact = _register_tool(analyze_elevation_impact_tool, "analyze_elevation_impact")
+get_seasonal_training_advice = _register_tool(get_seasonal_training_advice_tool, "get_seasonal_training_advice")
+optimize_training_environment = _register_tool(optimize_training_environment_tool, "optimize_training_environment")
 
 
 # =============================================================================
 # EQUIPMENT & GEAR TOOLS
 # =============================================================================
 
-@mcp.tool()
-async def analyze_shoe_rotation() -> str:
-    """Analyze shoe rotation patterns and provide optimization recommendations."""
-    track_last_action("analyze_shoe_rotation")
-    return await analyze_shoe_rotation_tool()
-
-
-@mcp.tool()
-async def get_gear_recommendations(scenario: str = "general", season: str = "current") -> str:
-    """Get intelligent gear recommendations based on training goals and conditions.
-    
-    Args:
-        scenario: Training scenario ('racing', 'long_runs', 'speed_work', 'trails', 'weather', 'general')
-        season: Season for recommendations ('spring', 'summer', 'fall', 'winter', 'current')
-    """
-    track_last_action("get_gear_recommendations")
-    return await get_gear_recommendations_tool(scenario, season)
-
-
-@mcp.tool()
-async def track_equipment_maintenance(equipment_type: str = "shoes") -> str:
-    """Track equipment maintenance needs and provide scheduling recommendations.
-    
-    Args:
-        equipment_type: Type of equipment to track ('shoes', 'all')
-    """
-    track_last_action("track_equipment_maintenance")
-    return await track_equipment_maintenance_tool(equipment_type)
-
-
-@mcp.tool()
-async def optimize_gear_selection(run_type: str = "general", distance: float = 5.0) -> str:
-    """Get optimized gear selection recommendations for specific runs.
-    
-    Args:
-        run_type: Type of run ('easy', 'tempo', 'intervals', 'long', 'race', 'recovery')
-        distance: Distance of the planned run
-    """
-    track_last_action("optimize_gear_selection")
-    return await optimize_gear_selection_tool(run_type, distance)
-
-
-@mcp.tool()
-async def plan_equipment_lifecycle() -> str:
-    """Plan equipment lifecycle and replacement strategies."""
-    track_last_action("plan_equipment_lifecycle")
-    return await plan_equipment_lifecycle_tool()
+analyze_shoe_rotation = _register_tool(analyze_shoe_rotation_tool, "analyze_shoe_rotation")
+get_gear_recommendations = _register_tool(get_gear_recommendations_tool, "get_gear_recommendations")
+track_equipment_maintenance = _register_tool(track_equipment_maintenance_tool, "track_equipment_maintenance")
+optimize_gear_selection = _register_tool(optimize_gear_selection_tool, "optimize_gear_selection")
+plan_equipment_lifecycle = _register_tool(plan_equipment_lifecycle_tool, "plan_equipment_lifecycle")
 
 
 # =============================================================================
 # COMPETITION & RACING TOOLS
 # =============================================================================
 
-@mcp.tool()
-async def create_race_strategy(race_distance: float, goal_time: str, 
-                              race_date: str, course_type: str = "road") -> str:
-    """Create a comprehensive race strategy based on fitness and race details.
-    
-    Args:
-        race_distance: Distance of the race in miles
-        goal_time: Target finish time (HH:MM:SS format)
-        race_date: Race date (YYYY-MM-DD format)
-        course_type: Type of course ('road', 'trail', 'track', 'hilly', 'flat')
-    """
-    track_last_action("create_race_strategy")
-    return await create_race_strategy_tool(race_distance, goal_time, race_date, course_type)
-
-
-@mcp.tool()
-async def analyze_race_readiness(race_distance: float, race_date: str) -> str:
-    """Analyze readiness for an upcoming race based on training history.
-    
-    Args:
-        race_distance: Distance of the upcoming race
-        race_date: Date of the race (YYYY-MM-DD format)
-    """
-    track_last_action("analyze_race_readiness")
-    return await analyze_race_readiness_tool(race_distance, race_date)
-
-
-@mcp.tool()
-async def benchmark_performance(time_period: str = "1year") -> str:
-    """Benchmark performance against previous runs and estimated potential.
-    
-    Args:
-        time_period: Period for comparison ('3months', '6months', '1year', 'all')
-    """
-    track_last_action("benchmark_performance")
-    return await benchmark_performance_tool(time_period)
-
-
-@mcp.tool()
-async def plan_race_calendar(season: str = "current", focus: str = "general") -> str:
-    """Plan an optimal race calendar based on goals and training cycles.
-    
-    Args:
-        season: Target season ('spring', 'summer', 'fall', 'winter', 'current', 'year')
-        focus: Training focus ('5k', '10k', 'half', 'marathon', 'trail', 'general')
-    """
-    track_last_action("plan_race_calendar")
-    return await plan_race_calendar_tool(season, focus)
+create_race_strategy = _register_tool(create_race_strategy_tool, "create_race_strategy")
+analyze_race_readiness = _register_tool(analyze_race_readiness_tool, "analyze_race_readiness")
+benchmark_performance = _register_tool(benchmark_performance_tool, "benchmark_performance")
+plan_race_calendar = _register_tool(plan_race_calendar_tool, "plan_race_calendar")
+analyze_post_race_performance = _register_tool(analyze_post_race_performance_tool, "analyze_post_race_performance")
 
 
-@mcp.tool()
-async def analyze_post_race_performance(race_distance: float, race_time: str, 
-                                       race_date: str, effort_level: str = "maximum") -> str:
-    """Analyze post-race performance and provide insights for future improvement.
-    
-    Args:
-        race_distance: Distance of the completed race
-        race_time: Actual finish time (HH:MM:SS format)
-        race_date: Date of the race (YYYY-MM-DD format)
-        effort_level: Perceived effort ('maximum', 'hard', 'moderate', 'easy')
-    """
-    track_last_action("analyze_post_race_performance")
-    return await analyze_post_race_performance_tool(race_distance, race_time, race_date, effort_level)
+# Last get_current_datetime rendering: (user_id, cached_at, text). A single slot,
+# since only the active user's clock is asked for within a turn; the 1 s TTL is
+# the only expiry.
+_DATETIME_CACHE_TTL = 1.0
+_datetime_cache: Optional[Tuple[str, float, str]] = None
 
 
 @mcp.tool()
 async def get_current_datetime() -> str:
     """Get current date and time in user's timezone."""
+    global _datetime_cache
     track_last_action("get_current_datetime")
-    return await get_user_datetime()
+    # Repeated calls within one turn reuse the rendering from the last second
+    user_id = get_current_user_id()
+    if user_id and _datetime_cache is not None:
+        cached_user, cached_at, content = _datetime_cache
+        if cached_user == user_id and time.monotonic() - cached_at < _DATETIME_CACHE_TTL:
+            return content
+    
+    result = await get_user_datetime()
+    if user_id:
+        _datetime_cache = (user_id, time.monotonic(), result)
+    return result
 
 
 # =============================================================================
 # WEATHER TOOLS
 # =============================================================================
 
-@mcp.tool()
-async def get_current_weather(location: str = None) -> str:
-    """Get current weather conditions for running planning.
-    
-    Args:
-        location: Location name (city, state/country) or coordinates (lat,lon).
-                 If not provided, uses user's default location if available.
-    
-    Returns:
-        Formatted weather information with running-specific advice.
-    """
-    track_last_action("get_current_weather")
-    return await get_current_weather_tool(location)
+get_current_weather = _register_tool(get_current_weather_tool, "get_current_weather")
+get_weather_forecast = _register_tool(get_weather_forecast_tool, "get_weather_forecast")
+analyze_weather_impact = _register_tool(analyze_weather_impact_tool, "analyze_weather_impact")
 
 
-@mcp.tool()
-async def get_weather_forecast(location: str = None, days: int = 5) -> str:
-    """Get weather forecast for running planning.
-    
-    Args:
-        location: Location name (city, state/country) or coordinates (lat,lon).
-                 If not provided, uses user's default location if available.
-        days: Number of days to forecast (1-5).
-    
-    Returns:
-        Formatted weather forecast with running recommendations.
-    """
-    track_last_action("get_weather_forecast")
-    return await get_weather_forecast_tool(location, days)
+# tools/list tools, built on first request: every tool is registered at import,
+# so the schemas never change afterwards
+_tools_list_cache: Optional[List[types.Tool]] = None
 
 
-@mcp.tool()
-async def analyze_weather_impact(location: str = None) -> str:
-    """Analyze weather impact on running performance and provide recommendations.
-    
-    Args:
-        location: Location name (city, state/country) or coordinates (lat,lon).
-                 If not provided, uses user's default location if available.
-    
-    Returns:
-        Detailed analysis of weather impact on running performance.
-    """
-    track_last_action("analyze_weather_impact")
-    return await analyze_weather_impact_tool(location)
+async def _list_tools_cached() -> List[types.Tool]:
+    """Answer tools/list from a prebuilt tool list instead of rebuilding every tool."""
+    global _tools_list_cache
+    if _tools_list_cache is None:
+        _tools_list_cache = await mcp.list_tools()
+    return _tools_list_cache
+
+
+# FastMCP has no public hook for replacing its tools/list handler. Returning a
+# list[Tool] works with both the older and newer lowlevel handler signatures.
+mcp._mcp_server.list_tools()(_list_tools_cached)
 
 
 # =============================================================================
 # HEALTH AND UTILITY FUNCTIONS
 # =============================================================================
 
-async def cleanup():
-    """Cleanup function to properly close database connections."""
-    global DB_POOL
-    
-    # Cleanup user context manager
+# Upper bound on shutdown work so a hung database cannot outlast the
+# supervisor's SIGTERM grace period
+_CLEANUP_TIMEOUT = 5.0
+
+
+async def _cleanup_user_contexts() -> None:
+    """Save dirty sessions and stop the user context manager's tasks."""
     from .user_context.context import get_user_context_manager
     try:
         manager = get_user_context_manager()
         await manager.cleanup()
     except Exception as e:
         logger.error(f"Error cleaning up user context manager: {e}")
-    
-    # Close database pool
+
+
+async def _close_weather_session() -> None:
+    """Close the shared weather HTTP session."""
+    try:
+        await close_http_session()
+    except Exception as e:
+        logger.error(f"Error closing weather HTTP session: {e}")
+
+
+async def _close_resources() -> None:
+    """Release connections; the pool closes last since sessions save through it."""
+    await asyncio.gather(_cleanup_user_contexts(), _close_weather_session())
     await close_pool(DB_POOL)
-    DB_POOL = None
+
+
+async def cleanup():
+    """Cleanup function to properly close database connections.
+    
+    Gives up after _CLEANUP_TIMEOUT seconds and terminates the pool instead.
+    """
+    global DB_POOL, _last_healthy_at
+    
+    try:
+        await asyncio.wait_for(_close_resources(), _CLEANUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error("Cleanup timed out after %ss, terminating database pool", _CLEANUP_TIMEOUT)
+        if DB_POOL is not None:
+            DB_POOL.terminate()
+    finally:
+        DB_POOL = None
+        _last_healthy_at = None
+        # Emit any buffered audit records before shutdown
+        SecurityAuditLog.flush()
+
+
+# A passing health check is trusted for this long, so frequent liveness
+# probes do not each cost a database round-trip. Failures are never cached.
+_HEALTH_CHECK_TTL = 2.0
+_last_healthy_at: Optional[float] = None
 
 
 async def health_check() -> bool:
     """Check if the server and database are healthy."""
+    global _last_healthy_at
+    if _last_healthy_at is not None and time.monotonic() - _last_healthy_at < _HEALTH_CHECK_TTL:
+        return True
+    
     try:
         pool = await get_pool()
-        return await validate_connection(pool)
+        healthy = await validate_connection(pool)
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return False
+        healthy = False
+    
+    _last_healthy_at = time.monotonic() if healthy else None
+    return healthy
+
+
+def _backend_options() -> Dict[str, bool]:
+    """anyio backend options for the server loop.
+    
+    Runs on uvloop when the optional ``uvloop`` extra is installed and falls
+    back to the default asyncio loop otherwise.
+    """
+    use_uvloop = sys.platform != "win32" and importlib.util.find_spec("uvloop") is not None
+    return {"use_uvloop": use_uvloop}
+
+
+async def _serve() -> None:
+    """Serve MCP over stdio and always run cleanup() on the way out."""
+    # SIGTERM cancels the serving task so shutdown unwinds through the
+    # finally block below; SIGINT is already handled by the asyncio runner
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass  # Not supported on Windows; SIGTERM terminates the process
+    
+    try:
+        await mcp.run_stdio_async()
+    finally:
+        try:
+            loop.remove_signal_handler(signal.SIGTERM)
+        except NotImplementedError:
+            pass
+        with anyio.CancelScope(shield=True):
+            try:
+                await cleanup()
+            except Exception as e:
+                logger.error(f"Error during cleanup: {e}")
 
 
 def main():
     """Main entry point for the MCP server."""
-    import asyncio
-    import signal
-    
-    def signal_handler(signum, frame):
-        """Handle shutdown signals gracefully."""
-        logger.info(f"Received signal {signum}, shutting down...")
-        raise KeyboardInterrupt()
+    # Log startup information
+    server_config = config.server
+    logger.info("Starting %s v%s", server_config.name, server_config.version)
+    logger.info("Environment: %s", config.environment.value)
+    logger.info("Log level: %s", server_config.log_level.value)
     
-    # Set up signal handlers
-    signal.signal(signal.SIGTERM, signal_handler)
-    signal.signal(signal.SIGINT, signal_handler)
+    backend_options = _backend_options()
+    if backend_options["use_uvloop"]:
+        logger.info("Using uvloop event loop")
     
     try:
-        # Log startup information
-        logger.info(f"Starting {config.server.name} v{config.server.version}")
-        logger.info(f"Environment: {config.environment.value}")
-        logger.info(f"Log level: {config.server.log_level.value}")
-        
-        # Initialize and run the server
-        mcp.run(transport='stdio')
-    except KeyboardInterrupt:
+        anyio.run(_serve, backend_options=backend_options)
+    except (KeyboardInterrupt, asyncio.CancelledError):
         logger.info("Server shutdown requested")
     except Exception as e:
         logger.error(f"Server startup failed: {e}")
         raise
-    finally:
-        # Cleanup on exit
-        try:
-            # Try to get existing event loop, create new one if none exists
-            try:
-                loop = asyncio.get_running_loop()
-                # If we have a running loop, schedule cleanup
-                loop.create_task(cleanup())
-            except RuntimeError:
-                # No running loop, create a new one for cleanup
-                try:
-                    loop = asyncio.get_event_loop()
-                    if not loop.is_closed():
-                        loop.run_until_complete(cleanup())
-                        loop.close()
-                except Exception:
-                    # If all else fails, create a new loop
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        loop.run_until_complete(cleanup())
-                    finally:
-                        loop.close()
-        except Exception as e:
-            logger.error(f"Error during cleanup: {e}")
-            # Don't raise, just log the error
 
 
 if __name__ == "__main__":
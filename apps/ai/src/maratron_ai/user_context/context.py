@@ -2,21 +2,93 @@
 import json
 import time
 import uuid
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set, Tuple
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
+from functools import wraps
 import asyncio
+import heapq
+import itertools
 import logging
 from ..database_utils import (
     fetch_with_timeout, 
     fetchrow_with_timeout,
-    execute_with_timeout
+    execute_with_timeout,
+    executemany_with_timeout
 )
 from ..config import get_config
 
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # optional "orjson" extra
+    orjson = None
+
 config = get_config()
 
+# Upper bound on rows any single user-facing query may return
+MAX_RESULTS_PER_QUERY = 100
+
+# Hard cap on sessions held in memory; least recently used ones beyond it are
+# evicted and written back to the database
+MAX_ACTIVE_SESSIONS = 10_000
+
+# Background task cadence, in seconds
+SESSION_SAVE_INTERVAL = 60.0
+SESSION_CLEANUP_INTERVAL = 300.0
+
+# Rows from the joined user lookup in set_current_user: user_id -> (cached_at, row),
+# least recently used first. Entries are dropped when the user row, or the runs
+# and shoes aggregated into it, change through this server.
+USER_DATA_CACHE_TTL = 300.0
+USER_DATA_CACHE_SIZE = 256
+_user_data_cache: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+
+
+def invalidate_user_data(user_id: str) -> None:
+    """Drop a user's cached lookup row after their row is updated or deleted."""
+    _user_data_cache.pop(user_id, None)
+
+
+# Session save statements, kept as fixed strings so asyncpg's statement
+# cache reuses their prepared statements on every save.
+_UPSERT_SESSIONS_QUERY = (
+    'INSERT INTO "UserSessions" '
+    '(id, "userId", "sessionData", "createdAt", "lastActivity", "expiresAt", active) '
+    'VALUES ($1, $2, $3, $4, $5, $6, $7) '
+    'ON CONFLICT (id) DO UPDATE '
+    'SET "sessionData"=EXCLUDED."sessionData", "lastActivity"=EXCLUDED."lastActivity", '
+    '"expiresAt"=EXCLUDED."expiresAt", active=EXCLUDED.active'
+)
+
+_TOUCH_SESSIONS_QUERY = (
+    'UPDATE "UserSessions" AS s '
+    'SET "lastActivity"=u.ts, "expiresAt"=u.ts + INTERVAL \'24 hours\', active=$3 '
+    'FROM UNNEST($1::text[], $2::timestamp[]) AS u(id, ts) '
+    'WHERE s.id=u.id'
+)
+
+
+def _dumps(data: Any) -> str:
+    """Serialize sessionData, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(data)
+
+
+def _loads(data: str) -> Any:
+    """Parse sessionData, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Naive UTC epoch, for converting session timestamps to and from datetimes
+_EPOCH = datetime(1970, 1, 1)
+
 
 class UserPreferences(BaseModel):
     """User preferences for chatbot interactions."""
@@ -27,7 +99,7 @@ class UserPreferences(BaseModel):
     notification_enabled: bool = Field(default=True)
     detailed_responses: bool = Field(default=True)
     include_social_data: bool = Field(default=True)
-    max_results_per_query: int = Field(default=10, ge=1, le=100)
+    max_results_per_query: int = Field(default=10, ge=1, le=MAX_RESULTS_PER_QUERY)
 
 
 @dataclass
@@ -47,6 +119,17 @@ class ConversationContext:
             self.mentioned_shoes = []
         if self.mentioned_goals is None:
             self.mentioned_goals = []
+    
+    def to_json_dict(self) -> Dict[str, Any]:
+        """Fields as a dict for serialization, sharing the lists rather than copying them."""
+        return {
+            'last_topic': self.last_topic,
+            'mentioned_runs': self.mentioned_runs,
+            'mentioned_shoes': self.mentioned_shoes,
+            'mentioned_goals': self.mentioned_goals,
+            'conversation_mood': self.conversation_mood,
+            'last_action': self.last_action
+        }
 
 
 class UserSession:
@@ -56,31 +139,54 @@ class UserSession:
         self.user_id = user_id
         self.session_id = session_id or f"session_{user_id}_{int(time.time())}"
         self.created_at = datetime.utcnow()
-        self.last_activity = datetime.utcnow()
+        # Seconds since the epoch; last_activity materializes it as a datetime
+        self._last_activity_ts = time.time()
         self.preferences: Optional[UserPreferences] = None
         self.conversation_context = ConversationContext()
         self.cached_user_data: Dict[str, Any] = {}
         self.session_metadata: Dict[str, Any] = {}
         self.db_id: Optional[str] = None  # Database record ID
         self._needs_db_save = False
+        # Hash of the sessionData last written, ignoring last_activity
+        self._saved_body_hash: Optional[int] = None
+        # Owning manager's set of dirty user IDs, once the session is registered
+        self._dirty_user_ids: Optional[Set[str]] = None
+        
+    @property
+    def last_activity(self) -> datetime:
+        """Last activity as a naive UTC datetime."""
+        return _EPOCH + timedelta(seconds=self._last_activity_ts)
+    
+    @last_activity.setter
+    def last_activity(self, value: datetime):
+        self._last_activity_ts = (value - _EPOCH).total_seconds()
         
-    def update_activity(self):
+    def update_activity(self, now_ts: Optional[float] = None):
         """Update last activity timestamp."""
-        self.last_activity = datetime.utcnow()
-        self._needs_db_save = True
+        self._last_activity_ts = time.time() if now_ts is None else now_ts
+        self.mark_dirty()
     
-    def is_expired(self, timeout_minutes: int = 60) -> bool:
+    def expiry_ts(self, timeout_minutes: int = 60) -> float:
+        """Epoch time at which the session expires unless there is further activity."""
+        return self._last_activity_ts + timeout_minutes * 60
+    
+    def is_expired(self, timeout_minutes: int = 60, now_ts: Optional[float] = None) -> bool:
         """Check if session has expired."""
-        expiry_time = self.last_activity + timedelta(minutes=timeout_minutes)
-        return datetime.utcnow() > expiry_time
+        if now_ts is None:
+            now_ts = time.time()
+        return now_ts > self.expiry_ts(timeout_minutes)
     
     def mark_dirty(self):
         """Mark session as needing database save."""
         self._needs_db_save = True
+        if self._dirty_user_ids is not None:
+            self._dirty_user_ids.add(self.user_id)
     
     def mark_clean(self):
         """Mark session as clean (saved to database)."""
         self._needs_db_save = False
+        if self._dirty_user_ids is not None:
+            self._dirty_user_ids.discard(self.user_id)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert session to dictionary for storage."""
@@ -88,9 +194,9 @@ class UserSession:
             'user_id': self.user_id,
             'session_id': self.session_id,
             'created_at': self.created_at.isoformat(),
-            'last_activity': self.last_activity.isoformat(),
+            'last_activity_ts': self._last_activity_ts,
             'preferences': self.preferences.dict() if self.preferences else None,
-            'conversation_context': asdict(self.conversation_context),
+            'conversation_context': self.conversation_context.to_json_dict(),
             'cached_user_data': self.cached_user_data,
             'session_metadata': self.session_metadata
         }
@@ -100,7 +206,11 @@ class UserSession:
         """Create session from dictionary."""
         session = cls(data['user_id'], data.get('session_id'))
         session.created_at = datetime.fromisoformat(data['created_at'])
-        session.last_activity = datetime.fromisoformat(data['last_activity'])
+        if 'last_activity_ts' in data:
+            session._last_activity_ts = data['last_activity_ts']
+        else:
+            # Written before activity was stored as an epoch timestamp
+            session.last_activity = datetime.fromisoformat(data['last_activity'])
         session.db_id = db_id
         
         if data.get('preferences'):
@@ -120,67 +230,139 @@ class UserContextManager:
     """Manages user contexts and sessions."""
     
     def __init__(self):
-        self.active_sessions: Dict[str, UserSession] = {}
+        # Least recently used first
+        self.active_sessions: OrderedDict[str, UserSession] = OrderedDict()
+        # Dirty sessions evicted from active_sessions, saved with the next batch
+        self._evicted_sessions: List[UserSession] = []
+        # User IDs of active sessions with unsaved changes, so saves need not
+        # scan every session
+        self._dirty_user_ids: Set[str] = set()
+        # (expiry_time, seq, session) entries, earliest first. Each registered
+        # session has one live entry; activity only moves its real expiry later,
+        # so entries are re-pushed when they come due, and entries for sessions
+        # no longer active are dropped then.
+        self._expiry_heap: List[Tuple[float, int, UserSession]] = []
+        self._expiry_seq = itertools.count()
         self.current_user_id: Optional[str] = None
-        self._cleanup_task: Optional[asyncio.Task] = None
-        self._save_task: Optional[asyncio.Task] = None
+        self._driver_task: Optional[asyncio.Task] = None
+        self._get_pool = None
         self._initialized = False
         self._start_background_tasks()
     
-    def _start_background_tasks(self):
-        """Start background tasks for cleanup and saving."""
-        if self._cleanup_task is None or self._cleanup_task.done():
-            self._cleanup_task = asyncio.create_task(self._cleanup_expired_sessions())
-        if self._save_task is None or self._save_task.done():
-            self._save_task = asyncio.create_task(self._periodic_save_sessions())
+    async def _pool(self):
+        """The server's connection pool, resolving the circular import only once."""
+        if self._get_pool is None:
+            from ..server import get_pool
+            self._get_pool = get_pool
+        return await self._get_pool()
+    
+    def _add_session(self, session: UserSession):
+        """Register a session as active and track its unsaved changes."""
+        session._dirty_user_ids = self._dirty_user_ids
+        if session._needs_db_save:
+            self._dirty_user_ids.add(session.user_id)
+        self.active_sessions[session.user_id] = session
+        self.active_sessions.move_to_end(session.user_id)
+        heapq.heappush(self._expiry_heap, (session.expiry_ts(), next(self._expiry_seq), session))
+        self._evict_lru_sessions()
+    
+    def _evict_lru_sessions(self):
+        """Drop least recently used sessions beyond MAX_ACTIVE_SESSIONS, keeping unsaved ones queued."""
+        while len(self.active_sessions) > MAX_ACTIVE_SESSIONS:
+            user_id, session = next(iter(self.active_sessions.items()))
+            needs_save = session._needs_db_save
+            self._remove_session(user_id)
+            if needs_save:
+                self._evicted_sessions.append(session)
+    
+    def _pop_expired_sessions(self, now_ts: Optional[float] = None) -> List[str]:
+        """User IDs of active sessions that have expired, touching only those due."""
+        if now_ts is None:
+            now_ts = time.time()
+        expired = []
+        while self._expiry_heap and self._expiry_heap[0][0] < now_ts:
+            _, _, session = heapq.heappop(self._expiry_heap)
+            if self.active_sessions.get(session.user_id) is not session:
+                continue
+            if session.is_expired(now_ts=now_ts):
+                expired.append(session.user_id)
+            else:
+                heapq.heappush(self._expiry_heap, (session.expiry_ts(), next(self._expiry_seq), session))
+        return expired
+    
+    def _remove_session(self, user_id: str):
+        """Drop a session from the active set."""
+        session = self.active_sessions.pop(user_id)
+        session._dirty_user_ids = None
+        self._dirty_user_ids.discard(user_id)
+    
+    def _dirty_sessions(self) -> List[UserSession]:
+        """Active sessions with changes not yet saved to the database."""
+        return [self.active_sessions[user_id] for user_id in self._dirty_user_ids]
+    
+    async def _save_pending_sessions(self) -> int:
+        """Save dirty active sessions and any evicted sessions still waiting to be written."""
+        evicted, self._evicted_sessions = self._evicted_sessions, []
+        try:
+            return await self._save_sessions_to_db(self._dirty_sessions() + evicted)
+        finally:
+            self._evicted_sessions.extend(session for session in evicted if session._needs_db_save)
     
-    async def _cleanup_expired_sessions(self):
-        """Cleanup expired sessions periodically."""
+    def _start_background_tasks(self):
+        """Start the background task that saves and cleans up sessions."""
+        if self._driver_task is None or self._driver_task.done():
+            self._driver_task = asyncio.create_task(self._run_background_tasks())
+    
+    async def _run_background_tasks(self):
+        """Save dirty sessions and clean up expired ones on their own deadlines."""
+        loop = asyncio.get_running_loop()
+        next_save = loop.time() + SESSION_SAVE_INTERVAL
+        next_cleanup = loop.time() + SESSION_CLEANUP_INTERVAL
         while True:
             try:
-                await asyncio.sleep(300)  # Check every 5 minutes
-                expired_sessions = [
-                    user_id for user_id, session in self.active_sessions.items()
-                    if session.is_expired()
-                ]
-                
-                # Save and remove expired sessions
-                for user_id in expired_sessions:
-                    session = self.active_sessions[user_id]
-                    await self._save_session_to_db(session, active=False)
-                    del self.active_sessions[user_id]
-                
-                # Cleanup old sessions from database
-                await self._cleanup_old_sessions_from_db()
-                
-                if expired_sessions:
-                    print(f"Cleaned up {len(expired_sessions)} expired sessions")
-                    
+                await asyncio.sleep(max(0.0, min(next_save, next_cleanup) - loop.time()))
             except asyncio.CancelledError:
                 break
-            except Exception as e:
-                print(f"Error in session cleanup: {e}")
+            
+            now = loop.time()
+            if now >= next_cleanup:
+                next_cleanup = now + SESSION_CLEANUP_INTERVAL
+                await self._cleanup_expired_sessions()
+            if now >= next_save:
+                next_save = now + SESSION_SAVE_INTERVAL
+                await self._periodic_save_sessions()
     
-    async def _periodic_save_sessions(self):
-        """Periodically save dirty sessions to database."""
-        while True:
-            try:
-                await asyncio.sleep(60)  # Save every minute
-                saved_count = 0
+    async def _cleanup_expired_sessions(self):
+        """Save and drop expired sessions, then prune old ones from the database."""
+        try:
+            expired_sessions = self._pop_expired_sessions()
+            
+            # Save and remove expired sessions
+            await self._save_sessions_to_db(
+                [self.active_sessions[user_id] for user_id in expired_sessions], active=False
+            )
+            for user_id in expired_sessions:
+                self._remove_session(user_id)
+            
+            # Cleanup old sessions from database
+            await self._cleanup_old_sessions_from_db()
+            
+            if expired_sessions:
+                logger.info(f"Cleaned up {len(expired_sessions)} expired sessions")
                 
-                for session in self.active_sessions.values():
-                    if session._needs_db_save:
-                        await self._save_session_to_db(session)
-                        session.mark_clean()
-                        saved_count += 1
+        except Exception as e:
+            logger.error(f"Error in session cleanup: {e}")
+    
+    async def _periodic_save_sessions(self):
+        """Save dirty sessions to database."""
+        try:
+            saved_count = await self._save_pending_sessions()
+            
+            if saved_count > 0:
+                logger.info(f"Saved {saved_count} sessions to database")
                 
-                if saved_count > 0:
-                    print(f"Saved {saved_count} sessions to database")
-                    
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                print(f"Error in periodic session save: {e}")
+        except Exception as e:
+            logger.error(f"Error in periodic session save: {e}")
     
     async def set_current_user(self, user_id: str) -> UserSession:
         """Set the current user and create/retrieve their session."""
@@ -192,13 +374,55 @@ class UserContextManager:
             session = await self._set_current_user_optimized(user_id)
             return session
         except Exception as e:
-            print(f"Optimized query failed, falling back to original: {e}")
+            logger.warning(f"Optimized query failed, falling back to original: {e}")
             return await self._set_current_user_fallback(user_id)
     
     async def _set_current_user_optimized(self, user_id: str) -> UserSession:
         """Optimized version using single JOIN query."""
-        from ..server import get_pool
-        pool = await get_pool()
+        pool = await self._pool()
+        
+        user_data = await self._fetch_user_data(pool, user_id)
+        
+        if not user_data:
+            raise ValueError(f"User {user_id} not found")
+        
+        self.current_user_id = user_id
+        
+        # Get or create session
+        if user_id in self.active_sessions:
+            session = self.active_sessions[user_id]
+            self.active_sessions.move_to_end(user_id)
+            session.update_activity()
+        else:
+            # Try to load existing session from database first
+            session = await self._load_session_from_db(user_id)
+            
+            if session:
+                # Found existing session, update activity and refresh cached data
+                session.update_activity()
+                self._add_session(session)
+                # Update cached data with optimized query results
+                await self._update_cached_data_from_optimized_query(session, user_data)
+            else:
+                # Create new session with optimized data
+                session = UserSession(user_id)
+                session.mark_dirty()  # Needs to be saved
+                # Set preferences from optimized query
+                await self._set_preferences_from_optimized_query(session, user_data)
+                # Set cached data from optimized query
+                await self._set_cached_data_from_optimized_query(session, user_data)
+                self._add_session(session)
+        
+        return session
+    
+    async def _fetch_user_data(self, pool, user_id: str):
+        """Joined user, recent runs and shoes row, served from a short-lived per-user cache."""
+        entry = _user_data_cache.get(user_id)
+        if entry is not None:
+            cached_at, user_data = entry
+            if time.monotonic() - cached_at < USER_DATA_CACHE_TTL:
+                _user_data_cache.move_to_end(user_id)
+                return user_data
         
         # Single optimized query to get all user data at once
         user_data = await fetchrow_with_timeout(
@@ -258,46 +482,30 @@ class UserContextManager:
             user_id
         )
         
-        if not user_data:
-            raise ValueError(f"User {user_id} not found")
-        
-        self.current_user_id = user_id
-        
-        # Get or create session
-        if user_id in self.active_sessions:
-            session = self.active_sessions[user_id]
-            session.update_activity()
-        else:
-            # Try to load existing session from database first
-            session = await self._load_session_from_db(user_id)
-            
-            if session:
-                # Found existing session, update activity and refresh cached data
-                session.update_activity()
-                self.active_sessions[user_id] = session
-                # Update cached data with optimized query results
-                await self._update_cached_data_from_optimized_query(session, user_data)
-            else:
-                # Create new session with optimized data
-                session = UserSession(user_id)
-                session.mark_dirty()  # Needs to be saved
-                # Set preferences from optimized query
-                await self._set_preferences_from_optimized_query(session, user_data)
-                # Set cached data from optimized query
-                await self._set_cached_data_from_optimized_query(session, user_data)
-                self.active_sessions[user_id] = session
-        
-        return session
+        if user_data is not None:
+            _user_data_cache[user_id] = (time.monotonic(), user_data)
+            _user_data_cache.move_to_end(user_id)
+            if len(_user_data_cache) > USER_DATA_CACHE_SIZE:
+                _user_data_cache.popitem(last=False)
+        return user_data
     
     async def _set_current_user_fallback(self, user_id: str) -> UserSession:
-        """Fallback to original multi-query approach."""
-        from ..server import get_pool
-        pool = await get_pool()
+        """Fallback using a plain user lookup, without the recent runs and shoes aggregates."""
+        pool = await self._pool()
         
-        # Original user validation query
+        # User row, preferences and recent run count in one round-trip
         user_row = await fetchrow_with_timeout(
-            pool, 
-            'SELECT id, name, email FROM "Users" WHERE id=$1', 
+            pool,
+            '''
+            SELECT u.id, u.name, u.email, u."defaultDistanceUnit", u."trainingLevel", u.goals,
+                   COALESCE(r.count, 0) AS recent_runs_count
+            FROM "Users" u
+            LEFT JOIN LATERAL (
+                SELECT COUNT(*) AS count FROM "Runs"
+                WHERE "userId" = u.id AND date >= NOW() - INTERVAL '30 days'
+            ) r ON true
+            WHERE u.id = $1
+            ''',
             user_id
         )
         
@@ -309,6 +517,7 @@ class UserContextManager:
         # Get or create session
         if user_id in self.active_sessions:
             session = self.active_sessions[user_id]
+            self.active_sessions.move_to_end(user_id)
             session.update_activity()
         else:
             # Try to load existing session from database first
@@ -317,16 +526,14 @@ class UserContextManager:
             if session:
                 # Found existing session, update activity
                 session.update_activity()
-                self.active_sessions[user_id] = session
+                self._add_session(session)
             else:
                 # Create new session
                 session = UserSession(user_id)
                 session.mark_dirty()  # Needs to be saved
-                # Load user preferences from database
-                await self._load_user_preferences(session)
-                # Cache basic user data
-                await self._cache_user_data(session)
-                self.active_sessions[user_id] = session
+                await self._set_preferences_from_optimized_query(session, user_row)
+                self._cache_user_data(session, user_row)
+                self._add_session(session)
         
         return session
     
@@ -334,12 +541,14 @@ class UserContextManager:
         """Get the current user's session."""
         if self.current_user_id and self.current_user_id in self.active_sessions:
             session = self.active_sessions[self.current_user_id]
-            if not session.is_expired():
-                session.update_activity()
+            now_ts = time.time()
+            if not session.is_expired(now_ts=now_ts):
+                self.active_sessions.move_to_end(self.current_user_id)
+                session.update_activity(now_ts)
                 return session
             else:
                 # Session expired, remove it
-                del self.active_sessions[self.current_user_id]
+                self._remove_session(self.current_user_id)
                 self.current_user_id = None
         return None
     
@@ -363,7 +572,7 @@ class UserContextManager:
             for key, value in context_updates.items():
                 if hasattr(session.conversation_context, key):
                     setattr(session.conversation_context, key, value)
-            session.update_activity()
+            # get_current_session() has already recorded the activity
             session.mark_dirty()
     
     async def update_user_preferences(self, preferences: Dict[str, Any]):
@@ -384,35 +593,11 @@ class UserContextManager:
             session.update_activity()
             session.mark_dirty()
     
-    async def _load_user_preferences(self, session: UserSession):
-        """Load user preferences from database."""
-        try:
-            from ..server import get_pool
-            pool = await get_pool()
-            
-            # Try to get user's default units from Users table
-            user_row = await fetchrow_with_timeout(
-                pool,
-                'SELECT "defaultDistanceUnit", "defaultElevationUnit" FROM "Users" WHERE id=$1',
-                session.user_id
-            )
-            
-            if user_row:
-                distance_unit = user_row.get('defaultDistanceUnit', 'miles')
-                session.preferences = UserPreferences(distance_unit=distance_unit)
-            else:
-                session.preferences = UserPreferences()
-                
-        except Exception as e:
-            # Default preferences if loading fails
-            session.preferences = UserPreferences()
-            print(f"Failed to load user preferences: {e}")
-    
     async def _save_user_preferences(self, session: UserSession):
         """Save user preferences to database."""
         try:
-            from ..server import get_pool
-            pool = await get_pool()
+            from ..server import invalidate_user_profile
+            pool = await self._pool()
             
             if session.preferences:
                 # Update user's default distance unit in database
@@ -421,43 +606,20 @@ class UserContextManager:
                     session.preferences.distance_unit,
                     session.user_id
                 )
+                invalidate_user_profile(session.user_id)
                 
         except Exception as e:
-            print(f"Failed to save user preferences: {e}")
-    
-    async def _cache_user_data(self, session: UserSession):
-        """Cache frequently accessed user data."""
-        try:
-            from ..server import get_pool
-            pool = await get_pool()
-            
-            # Cache basic user info
-            user_row = await fetchrow_with_timeout(
-                pool,
-                'SELECT name, email, "trainingLevel", goals FROM "Users" WHERE id=$1',
-                session.user_id
-            )
-            
-            if user_row:
-                session.cached_user_data = {
-                    'name': user_row['name'],
-                    'email': user_row['email'],
-                    'training_level': user_row.get('trainingLevel'),
-                    'goals': user_row.get('goals', [])
-                }
-            
-            # Cache recent run count
-            recent_runs = await fetchrow_with_timeout(
-                pool,
-                'SELECT COUNT(*) as count FROM "Runs" WHERE "userId"=$1 AND date >= NOW() - INTERVAL \'30 days\'',
-                session.user_id
-            )
-            
-            if recent_runs:
-                session.cached_user_data['recent_runs_count'] = recent_runs['count']
-                
-        except Exception as e:
-            print(f"Failed to cache user data: {e}")
+            logger.error(f"Failed to save user preferences: {e}")
+    
+    def _cache_user_data(self, session: UserSession, user_row):
+        """Cache frequently accessed user data from the fallback lookup row."""
+        session.cached_user_data = {
+            'name': user_row['name'],
+            'email': user_row['email'],
+            'training_level': user_row.get('trainingLevel'),
+            'goals': user_row.get('goals', []),
+            'recent_runs_count': user_row['recent_runs_count']
+        }
     
     async def _set_preferences_from_optimized_query(self, session: UserSession, user_data):
         """Set user preferences from optimized query result."""
@@ -467,7 +629,7 @@ class UserContextManager:
         except Exception as e:
             # Default preferences if setting fails
             session.preferences = UserPreferences()
-            print(f"Failed to set preferences from optimized query: {e}")
+            logger.error(f"Failed to set preferences from optimized query: {e}")
     
     async def _set_cached_data_from_optimized_query(self, session: UserSession, user_data):
         """Set cached user data from optimized query result."""
@@ -482,7 +644,7 @@ class UserContextManager:
                 'shoes': user_data.get('shoes', [])
             }
         except Exception as e:
-            print(f"Failed to set cached data from optimized query: {e}")
+            logger.error(f"Failed to set cached data from optimized query: {e}")
     
     async def _update_cached_data_from_optimized_query(self, session: UserSession, user_data):
         """Update existing cached user data with optimized query result."""
@@ -497,55 +659,87 @@ class UserContextManager:
                 'shoes': user_data.get('shoes', [])
             })
         except Exception as e:
-            print(f"Failed to update cached data from optimized query: {e}")
+            logger.error(f"Failed to update cached data from optimized query: {e}")
     
     async def _save_session_to_db(self, session: UserSession, active: bool = True):
         """Save session to database."""
+        await self._save_sessions_to_db([session], active=active)
+    
+    async def _save_sessions_to_db(self, sessions: List[UserSession], active: bool = True) -> int:
+        """Save sessions to database in one batched upsert.
+        
+        Sessions whose data is unchanged since their last save, apart from the
+        activity timestamp, only have their activity columns updated, all in
+        one UPDATE over arrays of ids and timestamps, rather than the whole
+        sessionData blob rewritten. Both statements run in one
+        transaction on a single connection. Sessions are marked clean up front
+        and dirty again if the batch fails or is cancelled, so changes made
+        while the write is in flight are not lost. Returns the number of
+        sessions saved.
+        """
+        if not sessions:
+            return 0
+        
+        new_sessions = [session for session in sessions if not session.db_id]
         try:
-            from ..server import get_pool
-            pool = await get_pool()
-            
-            session_data = session.to_dict()
-            expires_at = session.last_activity + timedelta(hours=24)  # 24 hour expiry
+            pool = await self._pool()
             
-            if session.db_id:
-                # Update existing session
-                await execute_with_timeout(
-                    pool,
-                    '''UPDATE "UserSessions" 
-                       SET "sessionData"=$1, "lastActivity"=$2, "expiresAt"=$3, active=$4 
-                       WHERE id=$5''',
-                    json.dumps(session_data),
-                    session.last_activity,
-                    expires_at,
-                    active,
-                    session.db_id
-                )
-            else:
-                # Create new session
+            for session in new_sessions:
                 session.db_id = str(uuid.uuid4())
-                await execute_with_timeout(
-                    pool,
-                    '''INSERT INTO "UserSessions" 
-                       (id, "userId", "sessionData", "createdAt", "lastActivity", "expiresAt", active)
-                       VALUES ($1, $2, $3, $4, $5, $6, $7)''',
-                    session.db_id,
-                    session.user_id,
-                    json.dumps(session_data),
-                    session.created_at,
-                    session.last_activity,
-                    expires_at,
-                    active
-                )
+            
+            upsert_rows = []
+            touch_ids = []
+            touch_times = []
+            saved_hashes = []
+            for session in sessions:
+                last_activity = session.last_activity
+                expires_at = last_activity + timedelta(hours=24)  # 24 hour expiry
+                data = session.to_dict()
+                last_activity_ts = data.pop('last_activity_ts')
+                body_hash = hash(_dumps(data))
                 
-        except Exception as e:
-            print(f"Failed to save session to database: {e}")
+                if body_hash == session._saved_body_hash:
+                    touch_ids.append(session.db_id)
+                    touch_times.append(last_activity)
+                else:
+                    data['last_activity_ts'] = last_activity_ts
+                    upsert_rows.append((
+                        session.db_id,
+                        session.user_id,
+                        _dumps(data),
+                        session.created_at,
+                        last_activity,
+                        expires_at,
+                        active,
+                    ))
+                    saved_hashes.append((session, body_hash))
+                session.mark_clean()
+            
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    if upsert_rows:
+                        await executemany_with_timeout(conn, _UPSERT_SESSIONS_QUERY, upsert_rows)
+                    if touch_ids:
+                        await execute_with_timeout(conn, _TOUCH_SESSIONS_QUERY, touch_ids, touch_times, active)
+            
+            for session, body_hash in saved_hashes:
+                session._saved_body_hash = body_hash
+            return len(sessions)
+            
+        except (Exception, asyncio.CancelledError) as e:
+            for session in new_sessions:
+                session.db_id = None
+            for session in sessions:
+                session.mark_dirty()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            logger.error(f"Failed to save sessions to database: {e}")
+            return 0
     
     async def _load_session_from_db(self, user_id: str) -> Optional[UserSession]:
         """Load most recent active session for user from database."""
         try:
-            from ..server import get_pool
-            pool = await get_pool()
+            pool = await self._pool()
             
             row = await fetchrow_with_timeout(
                 pool,
@@ -557,20 +751,21 @@ class UserContextManager:
             )
             
             if row:
-                session_data = json.loads(row['sessionData'])
+                session_data = _loads(row['sessionData'])
                 session = UserSession.from_dict(session_data, row['id'])
+                # Activity-only saves update the column, not sessionData
+                session.last_activity = row['lastActivity']
                 return session
                 
         except Exception as e:
-            print(f"Failed to load session from database: {e}")
+            logger.error(f"Failed to load session from database: {e}")
         
         return None
     
     async def _cleanup_old_sessions_from_db(self):
         """Remove old expired sessions from database."""
         try:
-            from ..server import get_pool
-            pool = await get_pool()
+            pool = await self._pool()
             
             # Delete sessions older than 7 days
             cutoff_date = datetime.utcnow() - timedelta(days=7)
@@ -581,7 +776,7 @@ class UserContextManager:
             )
             
         except Exception as e:
-            print(f"Failed to cleanup old sessions from database: {e}")
+            logger.error(f"Failed to cleanup old sessions from database: {e}")
     
     async def _recover_sessions_on_startup(self):
         """Recover active sessions from database on startup."""
@@ -589,13 +784,12 @@ class UserContextManager:
             return
             
         try:
-            from ..server import get_pool
-            pool = await get_pool()
+            pool = await self._pool()
             
             # Load all active sessions that haven't expired
             rows = await fetch_with_timeout(
                 pool,
-                '''SELECT id, "userId", "sessionData" 
+                '''SELECT id, "userId", "sessionData", "lastActivity" 
                    FROM "UserSessions" 
                    WHERE active=true AND "expiresAt" > NOW()
                    ORDER BY "lastActivity" DESC'''
@@ -604,12 +798,17 @@ class UserContextManager:
             recovered_count = 0
             for row in rows:
                 try:
-                    session_data = json.loads(row['sessionData'])
+                    session_data = _loads(row['sessionData'])
                     session = UserSession.from_dict(session_data, row['id'])
+                    session.last_activity = row['lastActivity']
                     
                     # Only keep the most recent session per user
                     if session.user_id not in self.active_sessions:
-                        self.active_sessions[session.user_id] = session
+                        if len(self.active_sessions) >= MAX_ACTIVE_SESSIONS:
+                            break
+                        self._add_session(session)
+                        # Rows come newest first, so each older one goes to the LRU end
+                        self.active_sessions.move_to_end(session.user_id, last=False)
                         recovered_count += 1
                     else:
                         # Mark older session as inactive
@@ -620,14 +819,14 @@ class UserContextManager:
                         )
                         
                 except Exception as e:
-                    print(f"Failed to recover session {row['id']}: {e}")
+                    logger.error(f"Failed to recover session {row['id']}: {e}")
             
             self._initialized = True
             if recovered_count > 0:
-                print(f"Recovered {recovered_count} active sessions from database")
+                logger.info(f"Recovered {recovered_count} active sessions from database")
                 
         except Exception as e:
-            print(f"Failed to recover sessions on startup: {e}")
+            logger.error(f"Failed to recover sessions on startup: {e}")
             self._initialized = True  # Don't retry indefinitely
     
     def get_session_info(self, user_id: str) -> Optional[Dict[str, Any]]:
@@ -645,16 +844,14 @@ class UserContextManager:
     
     async def cleanup(self):
         """Cleanup resources."""
-        # Save all dirty sessions before cleanup
-        for session in self.active_sessions.values():
-            if session._needs_db_save:
-                await self._save_session_to_db(session)
+        # Stop the background task first so it cannot save alongside the final
+        # flush; a save it is cancelled in the middle of marks its sessions dirty again
+        if self._driver_task and not self._driver_task.done():
+            self._driver_task.cancel()
+            await asyncio.gather(self._driver_task, return_exceptions=True)
         
-        # Cancel background tasks
-        if self._cleanup_task and not self._cleanup_task.done():
-            self._cleanup_task.cancel()
-        if self._save_task and not self._save_task.done():
-            self._save_task.cancel()
+        # Save all dirty sessions, finishing even if cleanup itself is cancelled
+        await asyncio.shield(self._save_pending_sessions())
 
 
 # Global user context manager instance
@@ -684,6 +881,7 @@ def get_current_user_id() -> Optional[str]:
 def require_user_context():
     """Decorator to require user context for MCP tools."""
     def decorator(func):
+        @wraps(func)
         async def wrapper(*args, **kwargs):
             if not get_current_user_id():
                 return "Error: No user context set. Please use set_current_user first."
@@ -1,11 +1,38 @@
 """Intelligent context analysis and personalization."""
 
-from typing import Dict, List, Any
-from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import date
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain
 import re
 
 
+_GOAL_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r"want to (?:run|complete) (?:a )?(.+)",
+    r"goal (?:is|was) (?:to )?(.+)",
+    r"training for (?:a )?(.+)",
+    r"hoping to (.+)",
+    r"plan to (.+)"
+))
+
+# Any of the goal patterns, so messages that mention no goal are scanned once
+_ANY_GOAL_RE = re.compile("|".join(pattern.pattern for pattern in _GOAL_PATTERNS))
+
+# Discussion topic suggested for each insight type
+_TOPIC_SUGGESTIONS = {
+    "achievement": "Celebrating progress and setting new challenges",
+    "concern": "Injury prevention and recovery strategies",
+    "goal": "Goal-specific training plans and timelines"
+}
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso_date(date_str: str) -> date:
+    """Parse a YYYY-MM-DD run date; the same dates recur across insight calls."""
+    return date.fromisoformat(date_str)
+
+
 @dataclass
 class UserInsight:
     """Actionable insight about the user."""
@@ -29,10 +56,12 @@ class ContextIntelligence:
         if not runs_data:
             return insights
             
+        sorted_runs = sorted(runs_data, key=lambda x: x.get('date', ''))
+        recent_dates, distances = self._summarize_runs(sorted_runs, date.today())
+        
         # Pattern 1: Training consistency
-        recent_runs = [r for r in runs_data if self._is_recent(r.get('date', ''))]
-        if len(recent_runs) >= 3:
-            consistency = self._calculate_consistency(recent_runs)
+        if len(recent_dates) >= 3:
+            consistency = self._calculate_consistency(recent_dates)
             if consistency > 0.8:
                 insights.append(UserInsight(
                     type="pattern",
@@ -43,8 +72,8 @@ class ContextIntelligence:
                 ))
                 
         # Pattern 2: Distance progression
-        if len(runs_data) >= 5:
-            is_progressing = self._analyze_distance_progression(runs_data)
+        if len(distances) >= 5:
+            is_progressing = self._analyze_distance_progression(distances)
             if is_progressing:
                 insights.append(UserInsight(
                     type="achievement",
@@ -55,8 +84,8 @@ class ContextIntelligence:
                 ))
                 
         # Pattern 3: Potential overtraining
-        if len(recent_runs) >= 4:
-            overtraining_risk = self._check_overtraining_risk(recent_runs)
+        if len(recent_dates) >= 4:
+            overtraining_risk = self._check_overtraining_risk(recent_dates)
             if overtraining_risk:
                 insights.append(UserInsight(
                     type="concern",
@@ -114,50 +143,56 @@ class ContextIntelligence:
             "personalization_tips": self._get_personalization_tips(preferences, running_insights)
         }
         
-    def _is_recent(self, date_str: str, days: int = 14) -> bool:
+    def _is_recent(self, date_str: str, days: int = 14, today: Optional[date] = None) -> bool:
         """Check if date is within recent period."""
         try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            return (datetime.now() - date_obj).days <= days
+            date_obj = _parse_iso_date(date_str)
+            return ((today or date.today()) - date_obj).days <= days
         except (ValueError, TypeError):
             return False
             
-    def _calculate_consistency(self, runs: List[Dict]) -> float:
-        """Calculate training consistency score."""
-        if len(runs) < 2:
+    def _summarize_runs(self, sorted_runs: List[Dict], today: date,
+                        days: int = 14) -> Tuple[List[date], List[float]]:
+        """Recent run dates and all distances, in date order, from one pass over sorted runs."""
+        recent_dates = []
+        distances = []
+        for run in sorted_runs:
+            distances.append(run.get('distance', 0))
+            try:
+                run_date = _parse_iso_date(run.get('date', ''))
+            except (ValueError, TypeError):
+                continue
+            if (today - run_date).days <= days:
+                recent_dates.append(run_date)
+        return recent_dates, distances
+        
+    def _calculate_consistency(self, dates: List[date]) -> float:
+        """Calculate training consistency score from sorted run dates."""
+        if len(dates) < 2:
             return 0.0
-            
-        dates = [datetime.strptime(r.get('date', ''), '%Y-%m-%d') for r in runs]
-        dates.sort()
         
-        # Calculate average gap between runs
-        gaps = [(dates[i+1] - dates[i]).days for i in range(len(dates)-1)]
-        avg_gap = sum(gaps) / len(gaps)
+        # Average gap between runs; the gaps sum to the first-to-last span
+        avg_gap = (dates[-1] - dates[0]).days / (len(dates) - 1)
         
         # Consistency score: lower gaps = higher consistency
         return max(0, 1 - (avg_gap - 1) / 6)  # Ideal is every other day
         
-    def _analyze_distance_progression(self, runs: List[Dict]) -> bool:
-        """Check if user is showing distance progression."""
-        if len(runs) < 5:
+    def _analyze_distance_progression(self, distances: List[float]) -> bool:
+        """Check if user is showing distance progression, from distances in date order."""
+        if len(distances) < 5:
             return False
             
-        # Sort by date
-        sorted_runs = sorted(runs, key=lambda x: x.get('date', ''))
-        recent_avg = sum(r.get('distance', 0) for r in sorted_runs[-3:]) / 3
-        older_avg = sum(r.get('distance', 0) for r in sorted_runs[:3]) / 3
+        recent_avg = sum(distances[-3:]) / 3
+        older_avg = sum(distances[:3]) / 3
         
         return recent_avg > older_avg * 1.1  # 10% improvement
         
-    def _check_overtraining_risk(self, recent_runs: List[Dict]) -> bool:
-        """Check for signs of overtraining."""
-        if len(recent_runs) < 4:
+    def _check_overtraining_risk(self, dates: List[date]) -> bool:
+        """Check for signs of overtraining from sorted recent run dates."""
+        if len(dates) < 4:
             return False
             
         # Check for consecutive days without rest
-        dates = [datetime.strptime(r.get('date', ''), '%Y-%m-%d') for r in recent_runs]
-        dates.sort()
-        
         consecutive_days = 0
         max_consecutive = 0
         
@@ -173,21 +208,15 @@ class ContextIntelligence:
     def _extract_goals_from_conversations(self, conversations: List) -> List[str]:
         """Extract mentioned goals from conversation history."""
         goals = []
-        goal_patterns = [
-            r"want to (?:run|complete) (?:a )?(.+)",
-            r"goal (?:is|was) (?:to )?(.+)",
-            r"training for (?:a )?(.+)",
-            r"hoping to (.+)",
-            r"plan to (.+)"
-        ]
         
         for conv in conversations:
-            message = getattr(conv, 'user_message', '')
-            for pattern in goal_patterns:
-                matches = re.findall(pattern, message.lower())
-                goals.extend(matches)
+            message = getattr(conv, 'user_message', '').lower()
+            if not _ANY_GOAL_RE.search(message):
+                continue
+            for pattern in _GOAL_PATTERNS:
+                goals.extend(pattern.findall(message))
                 
-        return list(set(goals))  # Remove duplicates
+        return list(dict.fromkeys(goals))  # Remove duplicates, keeping order
         
     def _infer_goals_from_runs(self, runs: List[Dict]) -> List[UserInsight]:
         """Infer goals from running patterns."""
@@ -241,17 +270,12 @@ class ContextIntelligence:
             
     def _suggest_relevant_topics(self, running_insights: List, goal_insights: List) -> List[str]:
         """Suggest relevant discussion topics based on insights."""
-        topics = []
-        
-        for insight in running_insights + goal_insights:
-            if insight.type == "achievement":
-                topics.append("Celebrating progress and setting new challenges")
-            elif insight.type == "concern":
-                topics.append("Injury prevention and recovery strategies")
-            elif insight.type == "goal":
-                topics.append("Goal-specific training plans and timelines")
-                
-        return list(set(topics))
+        # dict.fromkeys dedupes while keeping first-mention order
+        return list(dict.fromkeys(
+            _TOPIC_SUGGESTIONS[insight.type]
+            for insight in chain(running_insights, goal_insights)
+            if insight.type in _TOPIC_SUGGESTIONS
+        ))
         
     def _get_motivational_context(self, insights: List[UserInsight]) -> Dict[str, str]:
         """Get motivational context based on insights."""
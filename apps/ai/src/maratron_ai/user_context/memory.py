@@ -1,6 +1,8 @@
 """Enhanced conversation memory for better user context."""
 
-from typing import Dict, List, Any
+from collections import Counter, deque
+from itertools import islice
+from typing import Deque, Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 
@@ -23,14 +25,24 @@ class ConversationEntry:
 
 
 class ConversationMemory:
-    """Manages rich conversation history and context."""
+    """Manages rich conversation history and context.
+    
+    Entries are kept oldest-first in a deque so expiring old conversations
+    only pops from the left, and unresolved questions are a bounded ring.
+    The top interests and the LLM context are computed once per added
+    conversation, since nothing else changes them.
+    """
+    
+    MAX_UNRESOLVED_QUESTIONS = 20
     
     def __init__(self, user_id: str):
         self.user_id = user_id
-        self.entries: List[ConversationEntry] = []
-        self.recurring_topics: Dict[str, int] = {}  # topic -> frequency
+        self.entries: Deque[ConversationEntry] = deque()
+        self.recurring_topics: Counter[str] = Counter()  # topic -> frequency
+        self._interests_cache: Optional[Tuple[str, ...]] = None
+        self._context_cache: Optional[Dict[str, Any]] = None
         self.user_patterns: Dict[str, Any] = {}
-        self.unresolved_questions: List[str] = []
+        self.unresolved_questions: Deque[str] = deque(maxlen=self.MAX_UNRESOLVED_QUESTIONS)
         
     def add_conversation(self, user_message: str, ai_response: str, 
                         intent: str = "general", entities: Dict = None,
@@ -49,12 +61,13 @@ class ConversationMemory:
         self.entries.append(entry)
         self._update_patterns(entry)
         self._cleanup_old_entries()
+        self._context_cache = None
         
     def _update_patterns(self, entry: ConversationEntry):
         """Update user patterns based on conversation."""
         # Track recurring topics
-        for topic in entry.entities.get('topics', []):
-            self.recurring_topics[topic] = self.recurring_topics.get(topic, 0) + 1
+        self.recurring_topics.update(entry.entities.get('topics', ()))
+        self._interests_cache = None
             
         # Track question patterns
         if entry.intent == 'question' and '?' in entry.user_message:
@@ -63,14 +76,16 @@ class ConversationMemory:
     def _cleanup_old_entries(self, keep_days: int = 30):
         """Keep only recent conversations."""
         cutoff = datetime.utcnow() - timedelta(days=keep_days)
-        self.entries = [e for e in self.entries if e.timestamp > cutoff]
+        # Entries are appended in time order, so expired ones are at the left
+        while self.entries and self.entries[0].timestamp <= cutoff:
+            self.entries.popleft()
         
     def get_recent_context(self, limit: int = 5) -> str:
         """Get formatted recent conversation context."""
         if not self.entries:
             return "No recent conversation history."
             
-        recent = self.entries[-limit:]
+        recent = islice(self.entries, max(len(self.entries) - limit, 0), None)
         context_lines = []
         
         for entry in recent:
@@ -82,9 +97,11 @@ class ConversationMemory:
         
     def get_user_interests(self) -> List[str]:
         """Get user's main interests based on conversation patterns."""
-        sorted_topics = sorted(self.recurring_topics.items(), 
-                             key=lambda x: x[1], reverse=True)
-        return [topic for topic, count in sorted_topics[:5] if count >= 2]
+        if self._interests_cache is None:
+            self._interests_cache = tuple(
+                topic for topic, count in self.recurring_topics.most_common(5) if count >= 2
+            )
+        return list(self._interests_cache)
         
     def has_unresolved_issues(self) -> bool:
         """Check if user has unresolved questions or concerns."""
@@ -92,11 +109,17 @@ class ConversationMemory:
         
     def get_context_for_llm(self) -> Dict[str, Any]:
         """Get comprehensive context for LLM."""
-        return {
-            "recent_conversations": self.get_recent_context(),
-            "main_interests": self.get_user_interests(),
-            "conversation_mood": self.entries[-1].sentiment if self.entries else "neutral",
-            "unresolved_questions": self.unresolved_questions[-3:],
-            "total_conversations": len(self.entries),
-            "engagement_level": "high" if len(self.entries) > 10 else "medium" if len(self.entries) > 3 else "new"
-        }
\ No newline at end of file
+        if self._context_cache is None:
+            self._context_cache = {
+                "recent_conversations": self.get_recent_context(),
+                "main_interests": tuple(self.get_user_interests()),
+                "conversation_mood": self.entries[-1].sentiment if self.entries else "neutral",
+                "unresolved_questions": tuple(self.unresolved_questions)[-3:],
+                "total_conversations": len(self.entries),
+                "engagement_level": "high" if len(self.entries) > 10 else "medium" if len(self.entries) > 3 else "new"
+            }
+        # Lists are rebuilt per call so callers never share the cached values
+        context = dict(self._context_cache)
+        context["main_interests"] = list(context["main_interests"])
+        context["unresolved_questions"] = list(context["unresolved_questions"])
+        return context
\ No newline at end of file
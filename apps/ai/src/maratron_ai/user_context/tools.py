@@ -1,5 +1,6 @@
 """MCP Tools for User Context Management."""
 import json
+import logging
 import pytz
 from datetime import datetime
 from typing import Optional
@@ -14,6 +15,8 @@ from .security import (
     get_security_validator
 )
 
+logger = logging.getLogger(__name__)
+
 
 @handle_database_errors
 @secure_user_operation("set_current_user")
@@ -46,9 +49,9 @@ async def set_current_user(user_id: str, timezone: str = None) -> str:
                     from .context import UserPreferences
                     session.preferences = UserPreferences(timezone=timezone)
                 
-                print(f"🌍 Updated user timezone to: {timezone}")
+                logger.info(f"Updated user timezone to: {timezone}")
             except Exception as tz_error:
-                print(f"⚠️ Invalid timezone '{timezone}', keeping default: {tz_error}")
+                logger.warning(f"Invalid timezone '{timezone}', keeping default: {tz_error}")
         
         user_info = {
             'user_id': session.user_id,
@@ -328,19 +331,25 @@ def get_user_name() -> str:
 
 
 def track_conversation_topic(topic: str):
-    """Track the current conversation topic."""
+    """Track the current conversation topic.
+    
+    get_current_user_session() already refreshes the session's activity
+    timestamp, so this is just an attribute write.
+    """
     session = get_current_user_session()
     if session:
         session.conversation_context.last_topic = topic
-        session.update_activity()
 
 
 def track_last_action(action: str):
-    """Track the last action performed."""
+    """Track the last action performed.
+    
+    get_current_user_session() already refreshes the session's activity
+    timestamp, so this is just an attribute write.
+    """
     session = get_current_user_session()
     if session:
         session.conversation_context.last_action = action
-        session.update_activity()
 
 
 @handle_database_errors
@@ -16,12 +16,33 @@ logger = logging.getLogger(__name__)
 _weather_cache: Dict[str, Dict[str, Any]] = {}
 _cache_timestamps: Dict[str, datetime] = {}
 
+# Shared HTTP session so weather requests reuse pooled connections
+_http_session: Optional[aiohttp.ClientSession] = None
+
 
 class WeatherAPIError(Exception):
     """Custom exception for weather API errors."""
     pass
 
 
+def _get_http_session() -> aiohttp.ClientSession:
+    """Get the shared HTTP session, creating it on first use."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        config = get_config()
+        timeout = aiohttp.ClientTimeout(total=config.weather.request_timeout)
+        _http_session = aiohttp.ClientSession(timeout=timeout)
+    return _http_session
+
+
+async def close_http_session() -> None:
+    """Close the shared HTTP session, if one was opened."""
+    global _http_session
+    if _http_session is not None:
+        await _http_session.close()
+        _http_session = None
+
+
 async def _get_weather_api_key() -> Optional[str]:
     """Get weather API key from configuration."""
     config = get_config()
@@ -51,6 +72,18 @@ async def _cache_weather_data(cache_key: str, data: Dict[str, Any]) -> None:
     _cache_timestamps[cache_key] = datetime.now()
 
 
+async def _get_weather_data(location: str, api_key: str) -> Dict[str, Any]:
+    """Get current weather data for a location, from cache when still valid."""
+    cache_key = f"weather:{location}"
+    cached_data = await _get_cached_weather(cache_key)
+    if cached_data:
+        return cached_data
+    
+    weather_data = await _fetch_weather_data(location, api_key)
+    await _cache_weather_data(cache_key, weather_data)
+    return weather_data
+
+
 async def _get_user_location() -> Optional[str]:
     """Get user's location from their profile or preferences."""
     try:
@@ -79,21 +112,18 @@ async def _fetch_weather_data(location: str, api_key: str) -> Dict[str, Any]:
         # City name
         url = f"{base_url}/weather?q={location}&appid={api_key}&units={config.weather.default_units}"
     
-    timeout = aiohttp.ClientTimeout(total=config.weather.request_timeout)
-    
     for attempt in range(config.weather.max_retries + 1):
         try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data
-                    elif response.status == 401:
-                        raise WeatherAPIError("Invalid API key")
-                    elif response.status == 404:
-                        raise WeatherAPIError(f"Location '{location}' not found")
-                    else:
-                        raise WeatherAPIError(f"API request failed with status {response.status}")
+            async with _get_http_session().get(url) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return data
+                elif response.status == 401:
+                    raise WeatherAPIError("Invalid API key")
+                elif response.status == 404:
+                    raise WeatherAPIError(f"Location '{location}' not found")
+                else:
+                    raise WeatherAPIError(f"API request failed with status {response.status}")
         except asyncio.TimeoutError:
             if attempt < config.weather.max_retries:
                 await asyncio.sleep(2 ** attempt)  # Exponential backoff
@@ -231,25 +261,7 @@ async def get_current_weather_tool(location: str = None) -> str:
             if not location:
                 return "📍 Please provide a location (city name or coordinates) to get weather information."
         
-        # Check cache
-        cache_key = f"weather:{location}"
-        cached_data = await _get_cached_weather(cache_key)
-        
-        if cached_data:
-            # Use cached data
-            user_units = get_user_distance_unit() or "metric"
-            # Convert from miles/kilometers to metric/imperial for weather API
-            if user_units == "miles":
-                user_units = "imperial"
-            else:
-                user_units = "metric"
-            return await _format_weather_for_running(cached_data, user_units)
-        
-        # Fetch fresh data
-        weather_data = await _fetch_weather_data(location, api_key)
-        
-        # Cache the data
-        await _cache_weather_data(cache_key, weather_data)
+        weather_data = await _get_weather_data(location, api_key)
         
         # Format for user
         user_units = get_user_distance_unit() or "metric"
@@ -313,14 +325,11 @@ async def get_weather_forecast_tool(location: str = None, days: int = 5) -> str:
         else:
             url = f"{base_url}/forecast?q={location}&appid={api_key}&units={config.weather.default_units}&cnt={days * 8}"
         
-        timeout = aiohttp.ClientTimeout(total=config.weather.request_timeout)
-        
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    forecast_data = await response.json()
-                else:
-                    return f"❌ Weather forecast request failed with status {response.status}"
+        async with _get_http_session().get(url) as response:
+            if response.status == 200:
+                forecast_data = await response.json()
+            else:
+                return f"❌ Weather forecast request failed with status {response.status}"
         
         # Format forecast
         user_units = get_user_distance_unit() or "metric"
@@ -426,8 +435,8 @@ async def analyze_weather_impact_tool(location: str = None) -> str:
             if not location:
                 return "📍 Please provide a location for weather impact analysis."
         
-        # Get detailed weather data
-        weather_data = await _fetch_weather_data(location, api_key)
+        # Get detailed weather data (cached by the lookup above)
+        weather_data = await _get_weather_data(location, api_key)
         
         # Analyze impact
         temp = weather_data['main']['temp']
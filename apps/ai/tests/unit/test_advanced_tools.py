@@ -462,7 +462,7 @@ class TestSocialTools:
         result = await create_run_post_tool(
             run_id='run-123',
             caption='Amazing morning run!',
-            share_to_groups='false'
+            share_to_groups=False
         )
 
         assert "Run Posted Successfully!" in result
@@ -1,6 +1,6 @@
 """Unit tests for database tools with mocked connections."""
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Import the server module
 import sys
@@ -64,6 +64,16 @@ class TestUserTools:
         
         assert result == "❌ User nonexistent-id not found."
 
+    @patch('maratron_ai.server.get_pool')
+    async def test_update_user_email_multiple_rows(self, mock_get_pool, mock_pool):
+        """Test a row count ending in zero is not mistaken for no match."""
+        mock_get_pool.return_value = mock_pool
+        mock_pool.execute.return_value = "UPDATE 10"
+        
+        result = await server.update_user_email("user-id", "new@example.com")
+        
+        assert result.startswith("✅")
+
     @patch('maratron_ai.server.get_pool')
     async def test_delete_user_success(self, mock_get_pool, mock_pool):
         """Test successful user deletion."""
@@ -84,6 +94,37 @@ class TestUserTools:
         
         assert result == "❌ User nonexistent-id not found."
 
+    @patch('maratron_ai.server.get_pool')
+    async def test_get_session_history_formats_sessions(self, mock_get_pool, mock_pool):
+        """Test each session renders as one block with real line breaks."""
+        from datetime import datetime
+        mock_get_pool.return_value = mock_pool
+        mock_pool.fetchrow.return_value = {"name": "Runner"}
+        mock_pool.fetch.return_value = [{
+            "sessionId": "session_user-id_1700000000",
+            "createdAt": datetime(2024, 1, 15, 8, 0),
+            "lastActivity": datetime(2024, 1, 15, 8, 45),
+            "expiresAt": datetime(2024, 1, 16, 8, 0),
+            "active": True,
+        }]
+        
+        result = await server.get_session_history("user-id")
+        
+        assert "\\n" not in result
+        assert "• Created: 2024-01-15 08:00 UTC\n" in result
+        assert "• Duration: 45 minutes\n" in result
+
+    @patch('maratron_ai.server.get_pool')
+    async def test_get_session_history_clamps_limit(self, mock_get_pool, mock_pool):
+        """Test an oversized limit is capped at the per-query maximum."""
+        mock_get_pool.return_value = mock_pool
+        mock_pool.fetchrow.return_value = {"name": "Runner"}
+        mock_pool.fetch.return_value = []
+        
+        await server.get_session_history("user-id", limit=1000)
+        
+        assert mock_pool.fetch.call_args[0][1:] == ("user-id", server.MAX_RESULTS_PER_QUERY)
+
 
 @pytest.mark.unit
 class TestRunTools:
@@ -102,6 +143,34 @@ class TestRunTools:
         assert "✅ Added run for user user-id with ID:" in result
         mock_pool.execute.assert_called_once()
 
+    @patch('maratron_ai.server.get_pool')
+    async def test_add_run_uses_single_statement(self, mock_get_pool, mock_pool):
+        """Test optional columns bind NULLs instead of changing the SQL text."""
+        mock_get_pool.return_value = mock_pool
+        mock_pool.execute.return_value = None
+        
+        await server.add_run("user-id", "2024-01-15", "00:30:00", 5.0, "miles")
+        await server.add_run(
+            "user-id", "2024-01-16", "00:45:00", 6.0, "miles", name="Tempo", shoe_id="shoe-id"
+        )
+        
+        first, second = mock_pool.execute.call_args_list
+        assert first[0][0] == second[0][0]
+        assert first[0][7:] == (None,) * 6
+        assert second[0][7] == "Tempo"
+        assert second[0][12] == "shoe-id"
+
+    @patch('maratron_ai.server.get_current_user_id', return_value="user-id")
+    @patch('maratron_ai.server.get_pool')
+    async def test_get_user_runs_clamps_limit(self, mock_get_pool, mock_current_user, mock_pool):
+        """Test the requested limit is capped before it reaches SQL LIMIT."""
+        mock_get_pool.return_value = mock_pool
+        mock_pool.fetch.return_value = []
+        
+        await server.get_user_runs(limit=10_000)
+        
+        assert mock_pool.fetch.call_args[0][2] == server.MAX_RESULTS_PER_QUERY
+
     # Note: list_recent_runs and list_runs_for_user are now MCP Resources
     # These tests are removed as they test Resources which use different patterns
 
@@ -121,6 +190,21 @@ class TestShoeTools:
         assert "✅ Added shoe 'Nike Air' for user user-id with ID:" in result
         mock_pool.execute.assert_called_once()
 
+    @patch('maratron_ai.server.get_current_user_id', return_value="user-id")
+    @patch('maratron_ai.server.get_pool')
+    async def test_get_user_shoes_projects_displayed_columns(self, mock_get_pool,
+                                                            mock_current_user, mock_pool):
+        """Test the shoes tool selects only the columns it renders."""
+        mock_get_pool.return_value = mock_pool
+        # asyncpg Records unpack by value in SELECT order
+        mock_pool.fetch.return_value = [("Pegasus", 100.0, 400.0, None, False)]
+        
+        result = await server.get_user_shoes()
+        
+        query = mock_pool.fetch.call_args[0][0]
+        assert "SELECT *" not in query
+        assert "**1. Pegasus** (25% used)" in result
+
     # Note: list_shoes is now an MCP Resource
     # These tests are removed as they test Resources which use different patterns
 
@@ -132,15 +216,342 @@ class TestUtilityTools:
     # Note: list_tables, describe_table, and count_rows are now MCP Resources
     # These tests are removed as they test Resources which use different patterns
 
-    def test_quote_ident_valid(self):
-        """Test quote_ident with valid identifier."""
-        result = server._quote_ident("valid_table_name")
+    def test_quote_identifier_valid(self):
+        """Test quote_identifier with valid identifier."""
+        result = server.quote_identifier("valid_table_name")
         assert result == '"valid_table_name"'
 
-    def test_quote_ident_invalid(self):
-        """Test quote_ident with invalid identifier."""
+    def test_quote_identifier_invalid(self):
+        """Test quote_identifier with invalid identifier."""
         with pytest.raises(ValueError, match="Invalid identifier"):
-            server._quote_ident("invalid-table-name!")
+            server.quote_identifier("invalid-table-name!")
+
+    @patch('maratron_ai.server.get_user_datetime', new_callable=AsyncMock)
+    @patch('maratron_ai.server.get_current_user_id')
+    async def test_current_datetime_reused_within_a_second(self, mock_user_id, mock_datetime):
+        """Test repeated get_current_datetime calls share one rendering per user."""
+        server._datetime_cache = None
+        mock_user_id.return_value = "user-1"
+        mock_datetime.side_effect = ["first", "second", "third", "fourth"]
+        
+        assert await server.get_current_datetime() == "first"
+        assert await server.get_current_datetime() == "first"
+        
+        mock_user_id.return_value = "user-2"
+        assert await server.get_current_datetime() == "second"
+        assert mock_datetime.await_count == 2
+        
+        # No user means no caching, and the cache never grows past one slot
+        mock_user_id.return_value = None
+        assert await server.get_current_datetime() == "third"
+        assert await server.get_current_datetime() == "fourth"
+        assert server._datetime_cache[0] == "user-2"
+        assert not any(key.startswith("datetime:") for key in server._resource_cache)
+
+
+@pytest.mark.unit
+class TestDatabaseResources:
+    """Test database introspection resources."""
+
+    def setup_method(self):
+        """Start each test with an empty resource cache."""
+        server._resource_cache.clear()
+
+    @patch('maratron_ai.server.get_pool')
+    async def test_database_schema_batches_queries(self, mock_get_pool, mock_pool):
+        """Test schema is built from one columns query and one row-count query."""
+        mock_get_pool.return_value = mock_pool
+        mock_pool.fetch.side_effect = [
+            [
+                {"table_name": "Runs", "column_name": "id", "data_type": "text", "is_nullable": "NO"},
+                {"table_name": "Runs", "column_name": "notes", "data_type": "text", "is_nullable": "YES"},
+                {"table_name": "Users", "column_name": "id", "data_type": "text", "is_nullable": "NO"},
+            ],
+            [{"relname": "Runs", "cnt": 42}],
+        ]
+        
+        result = await server.database_schema()
+        
+        assert mock_pool.fetch.call_count == 2
+        assert "## Table: Runs" in result
+        assert "| notes | text | Yes |" in result
+        assert "**Rows (approx.):** 42" in result
+        assert "## Table: Users" in result
+        assert "**Rows (approx.):** Unknown" in result
+
+    @patch('maratron_ai.server.get_pool')
+    async def test_database_stats_uses_catalog_estimates(self, mock_get_pool, mock_pool):
+        """Test stats read pg_class estimates and only count never-analyzed tables."""
+        mock_get_pool.return_value = mock_pool
+        mock_pool.fetch.return_value = [
+            {"relname": "Runs", "cnt": 1200},
+            {"relname": "Users", "cnt": -1},
+        ]
+        mock_pool.fetchrow.return_value = {"cnt": 3}
+        
+        result = await server.database_stats()
+        
+        mock_pool.fetch.assert_called_once()
+        mock_pool.fetchrow.assert_called_once()
+        assert 'FROM "Users"' in mock_pool.fetchrow.call_args[0][0]
+        assert "| Runs | 1,200 |" in result
+        assert "| Users | 3 |" in result
+        assert "**Total Rows:** 1,203" in result
+
+    async def test_exact_counts_limited_to_two_connections(self, mock_pool):
+        """Test exact-count fallbacks never hold more than two connections at once."""
+        import asyncio
+        mock_pool.fetch.return_value = [{"relname": f"T{i}", "cnt": -1} for i in range(6)]
+        in_flight = peak = 0
+        
+        async def count_rows(*args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"cnt": 1}
+        mock_pool.fetchrow.side_effect = count_rows
+        
+        counts = await server._fetch_row_estimates(mock_pool)
+        
+        assert counts == {f"T{i}": 1 for i in range(6)}
+        assert peak == 2
+
+    @patch('maratron_ai.server.get_pool')
+    async def test_database_stats_cached_until_write(self, mock_get_pool, mock_pool):
+        """Test stats are served from cache until a write tool invalidates them."""
+        mock_get_pool.return_value = mock_pool
+        mock_pool.fetch.return_value = [{"relname": "Users", "cnt": 5}]
+        
+        first = await server.database_stats()
+        second = await server.database_stats()
+        
+        assert first == second
+        mock_pool.fetch.assert_called_once()
+        
+        mock_pool.execute.return_value = None
+        await server.add_user("John Doe", "john@example.com")
+        await server.database_stats()
+        
+        assert mock_pool.fetch.call_count == 2
+
+
+@pytest.mark.unit
+class TestUserResources:
+    """Test user-scoped resources backed by the secure data layer."""
+
+    def setup_method(self):
+        """Start each test with an empty profile cache."""
+        server._profile_cache.clear()
+
+    @patch('maratron_ai.server.get_current_user_id', return_value="user-id")
+    @patch('maratron_ai.server.secure_db')
+    @patch('maratron_ai.server.get_pool')
+    async def test_profile_cached_until_user_row_changes(self, mock_get_pool, mock_secure_db,
+                                                        mock_current_user, mock_pool):
+        """Test repeated profile lookups reuse one query until the email is updated."""
+        mock_get_pool.return_value = mock_pool
+        mock_secure_db.get_user_profile = AsyncMock(return_value={"name": "Runner"})
+        mock_secure_db.get_user_shoes = AsyncMock(return_value=[])
+        
+        await server.user_shoes("user-id")
+        await server.user_shoes("user-id")
+        assert mock_secure_db.get_user_profile.await_count == 1
+        
+        mock_pool.execute.return_value = "UPDATE 1"
+        await server.update_user_email("user-id", "new@example.com")
+        await server.user_shoes("user-id")
+        assert mock_secure_db.get_user_profile.await_count == 2
+
+    @patch('maratron_ai.server.get_current_user_id', return_value="user-id")
+    @patch('maratron_ai.server.secure_db')
+    async def test_cached_profile_not_served_to_other_users(self, mock_secure_db,
+                                                          mock_current_user, mock_pool):
+        """Test another user's lookup still goes through secure_db's isolation check."""
+        mock_secure_db.get_user_profile = AsyncMock(return_value={"name": "Runner"})
+        await server._get_user_profile(mock_pool, "user-id")
+        
+        mock_current_user.return_value = "someone-else"
+        await server._get_user_profile(mock_pool, "user-id")
+        
+        assert mock_secure_db.get_user_profile.await_count == 2
+
+    @patch('maratron_ai.server.get_current_user_id', return_value="user-id")
+    @patch('maratron_ai.server.secure_db')
+    @patch('maratron_ai.server.get_pool')
+    async def test_user_shoes_fetches_profile_and_shoes(self, mock_get_pool, mock_secure_db,
+                                                        mock_current_user, mock_pool):
+        """Test user_shoes issues the profile and shoes lookups together."""
+        mock_get_pool.return_value = mock_pool
+        mock_secure_db.get_user_profile = AsyncMock(return_value={"name": "Runner"})
+        mock_secure_db.get_user_shoes = AsyncMock(return_value=[])
+        
+        result = await server.user_shoes("user-id")
+        
+        assert result == "No shoes found for Runner."
+        mock_secure_db.get_user_profile.assert_awaited_once_with(mock_pool, "user-id")
+        mock_secure_db.get_user_shoes.assert_awaited_once_with(mock_pool, "user-id")
+
+    @patch('maratron_ai.server.get_current_user_id', return_value="user-id")
+    @patch('maratron_ai.server.secure_db')
+    @patch('maratron_ai.server.get_pool')
+    async def test_user_shoes_groups_active_and_retired(self, mock_get_pool, mock_secure_db,
+                                                        mock_current_user, mock_pool):
+        """Test shoes are rendered in one pass using the query's group counts."""
+        from datetime import datetime
+        mock_get_pool.return_value = mock_pool
+        counts = {"active_count": 1, "retired_count": 1}
+        mock_secure_db.get_user_profile = AsyncMock(return_value={"name": "Runner"})
+        mock_secure_db.get_user_shoes = AsyncMock(return_value=[
+            {"name": "Pegasus", "retired": False, "currentDistance": 100.0, "maxDistance": 400.0,
+             "distanceUnit": "miles", "createdAt": datetime(2024, 1, 1), "notes": None, **counts},
+            {"name": "Ghost", "retired": True, "currentDistance": 400.0, "maxDistance": 400.0,
+             "distanceUnit": "miles", "createdAt": datetime(2023, 1, 1), "notes": None, **counts},
+        ])
+        
+        result = await server.user_shoes("user-id")
+        
+        assert "## Active Shoes (1)" in result
+        assert "- **Usage:** 100.0/400.0 miles (25.0%)" in result
+        assert "## Retired Shoes (1)" in result
+        assert result.index("Pegasus") < result.index("## Retired Shoes") < result.index("Ghost")
+
+    @patch('maratron_ai.server.get_current_user_id', return_value="user-id")
+    @patch('maratron_ai.server.secure_db')
+    @patch('maratron_ai.server.get_pool')
+    async def test_user_run_summary_binds_period(self, mock_get_pool, mock_secure_db,
+                                                 mock_current_user, mock_pool):
+        """Test the summary is one query with the period bound as a parameter."""
+        mock_get_pool.return_value = mock_pool
+        mock_secure_db.secure_fetchrow = AsyncMock(
+            return_value={"name": "Runner", "unit": "miles", "run_count": 0}
+        )
+        
+        result = await server.user_run_summary("user-id", "7d")
+        
+        assert result == "No runs found for Runner in the last 7 days."
+        mock_secure_db.secure_fetchrow.assert_awaited_once()
+        args = mock_secure_db.secure_fetchrow.call_args[0]
+        assert "make_interval(days => $2)" in args[1]
+        assert args[2:] == ("user-id", 7)
+
+    def test_parse_period_days(self):
+        """Test summary periods accept day, week, month and year suffixes."""
+        assert server._parse_period_days("7d") == 7
+        assert server._parse_period_days("4w") == 28
+        assert server._parse_period_days("6m") == 180
+        assert server._parse_period_days("1y") == 365
+        assert server._parse_period_days("0d") == 30
+        assert server._parse_period_days("soon") == 30
+
+    @patch('maratron_ai.server.get_user_max_results', return_value=2)
+    @patch('maratron_ai.server.secure_db')
+    @patch('maratron_ai.server.get_pool')
+    async def test_user_recent_runs_page_links_next_page(self, mock_get_pool, mock_secure_db,
+                                                        mock_max_results, mock_pool):
+        """Test a page fetches one extra row to decide whether to link the next page."""
+        from datetime import datetime
+        mock_get_pool.return_value = mock_pool
+        run = {"date": datetime(2024, 1, 1), "distance": 5.0, "distanceUnit": "miles",
+               "duration": "00:40:00", "pace": None, "name": None, "elevationGain": None, "notes": None}
+        mock_secure_db.get_user_profile = AsyncMock(return_value={"name": "Runner"})
+        mock_secure_db.get_user_runs = AsyncMock(return_value=[run, run, run])
+        
+        result = await server.user_recent_runs_page("user-id", "2")
+        
+        assert mock_secure_db.get_user_runs.call_args[0][2] == 3
+        assert mock_secure_db.get_user_runs.call_args[1] == {"offset": 2}
+        assert "## Run 3:" in result and "## Run 4:" in result
+        assert "## Run 5:" not in result
+        assert "runs://user/user-id/recent/3" in result
+
+    async def test_user_recent_runs_page_rejects_bad_page(self):
+        """Test non-positive or non-numeric pages are rejected before querying."""
+        assert "Invalid page" in await server.user_recent_runs_page("user-id", "0")
+        assert "Invalid page" in await server.user_recent_runs_page("user-id", "abc")
+
+    @patch('maratron_ai.server.get_current_user_id', return_value="someone-else")
+    @patch('maratron_ai.server.get_pool')
+    async def test_user_run_summary_denies_other_users(self, mock_get_pool, mock_current_user):
+        """Test the access check runs before any pool access."""
+        result = await server.user_run_summary("user-id", "30d")
+        
+        assert "Access denied" in result
+        mock_get_pool.assert_not_called()
+
+
+@pytest.mark.unit
+class TestToolRegistration:
+    """Test tools registered from *_tool implementations."""
+
+    async def test_registered_tool_keeps_implementation_schema(self):
+        """Test the registered tool exposes the implementation's parameters."""
+        tools = {tool.name: tool for tool in await server.mcp.list_tools()}
+        
+        assert "generate_training_plan" in tools
+        params = tools["generate_training_plan"].inputSchema
+        assert params["required"] == ["goal_type", "target_distance"]
+        assert params["properties"]["weeks"]["default"] == 12
+
+    async def test_tools_list_served_from_prebuilt_result(self):
+        """Test tools/list reuses one prebuilt list holding every registered tool."""
+        from mcp import types
+        handler = server.mcp._mcp_server.request_handlers[types.ListToolsRequest]
+        request = types.ListToolsRequest(method="tools/list")
+        
+        first = await handler(request)
+        second = await handler(request)
+        
+        assert all(a is b for a, b in zip(first.root.tools, second.root.tools, strict=True))
+        assert await server._list_tools_cached() is await server._list_tools_cached()
+        names = {tool.name for tool in first.root.tools}
+        assert names == {tool.name for tool in await server.mcp.list_tools()}
+        assert "create_run_post" in names
+
+    async def test_create_run_post_parses_share_flag(self):
+        """Test share_to_groups arrives as a bool whether sent as JSON or text."""
+        tools = {tool.name: tool for tool in await server.mcp.list_tools()}
+        assert tools["create_run_post"].inputSchema["properties"]["share_to_groups"]["type"] == "boolean"
+        
+        tool = server.mcp._tool_manager.get_tool("create_run_post")
+        for sent, expected in [(True, True), ("true", True), ("false", False)]:
+            parsed = tool.fn_metadata.arg_model.model_validate(
+                {"run_id": "run-1", "share_to_groups": sent}
+            )
+            assert parsed.share_to_groups is expected
+
+    @patch('maratron_ai.server.track_last_action')
+    async def test_registered_tool_tracks_action(self, mock_track):
+        """Test calling a registered tool records its action and delegates."""
+        impl = AsyncMock(return_value="plan")
+        impl.__name__ = "example_plan_tool"
+        
+        with patch.object(server.mcp, 'tool', return_value=lambda fn: fn):
+            tool = server._register_tool(impl, "example_action")
+        
+        assert tool.__name__ == "example_plan"
+        assert await tool(weeks=8) == "plan"
+        mock_track.assert_called_once_with("example_action")
+        impl.assert_awaited_once_with(weeks=8)
+
+
+@pytest.mark.unit
+class TestLogging:
+    """Test server logging setup."""
+
+    def test_root_logging_goes_through_queue(self):
+        """Test importing the server routes root logging through a QueueHandler."""
+        import logging
+        from logging.handlers import QueueHandler
+        
+        root_handlers = logging.getLogger().handlers
+        queue_handlers = [handler for handler in root_handlers if isinstance(handler, QueueHandler)]
+        assert len(queue_handlers) == 1
+        assert queue_handlers[0].queue is server._log_listener.queue
+        # The handlers found on the root at import now sit behind the listener thread
+        assert server._log_listener.handlers
+        assert not any(isinstance(handler, QueueHandler) for handler in server._log_listener.handlers)
 
 
 @pytest.mark.unit
@@ -166,6 +577,120 @@ class TestDatabaseConnection:
         call_args = mock_create_pool.call_args[0]
         assert "postgresql://" in call_args[0]
 
+    @patch('maratron_ai.server._check_expected_indexes', new_callable=AsyncMock)
+    @patch('maratron_ai.server.asyncpg.create_pool', new_callable=AsyncMock)
+    @patch.object(type(server.config), 'get_database_url')
+    async def test_get_pool_logs_host_only(self, mock_url, mock_create_pool, mock_check, caplog):
+        """Test the pool log line shows the host even when the password contains '@'."""
+        mock_url.return_value = "postgresql://user:p@ss@db.example:5432/maratrondb"
+        server.DB_POOL = None
+        
+        with caplog.at_level("INFO", logger="maratron_ai.server"):
+            await server.get_pool()
+        
+        assert "Creating database connection pool to db.example:5432/maratrondb" in caplog.text
+        assert "ss@" not in caplog.text
+        server.DB_POOL = None
+
+    async def test_check_expected_indexes_warns_when_missing(self, mock_pool, caplog):
+        """Test a warning lists the per-user indexes missing from pg_indexes."""
+        mock_pool.fetch.return_value = [
+            {"tablename": "Runs", "indexdef": 'CREATE INDEX idx_runs_user_date ON public."Runs" USING btree ("userId", date DESC)'},
+            {"tablename": "Shoes", "indexdef": 'CREATE INDEX idx_shoes_user_active ON public."Shoes" USING btree ("userId", "createdAt" DESC) WHERE (retired = false)'},
+        ]
+        
+        with caplog.at_level("WARNING", logger="maratron_ai.server"):
+            await server._check_expected_indexes(mock_pool)
+        
+        # Matched by columns, so the hand-made idx_runs_user_date counts; partial indexes do not
+        assert "Shoes (userId, createdAt DESC)" in caplog.text
+        assert "UserSessions (userId, createdAt DESC)" in caplog.text
+        assert "Runs (" not in caplog.text
+
+    @patch('maratron_ai.server.asyncpg.create_pool')
+    async def test_get_pool_creates_single_pool_concurrently(self, mock_create_pool):
+        """Test concurrent first calls share one pool instead of racing."""
+        import asyncio
+        mock_pool = AsyncMock()
+        async def async_create_pool(*args, **kwargs):
+            await asyncio.sleep(0)
+            return mock_pool
+        mock_create_pool.side_effect = async_create_pool
+        server.DB_POOL = None
+        
+        pools = await asyncio.gather(server.get_pool(), server.get_pool(), server.get_pool())
+        
+        assert all(pool is mock_pool for pool in pools)
+        mock_create_pool.assert_called_once()
+
+    @patch('maratron_ai.server.get_pool')
+    async def test_lifespan_prewarms_pool(self, mock_get_pool):
+        """Test the server lifespan creates the pool before serving."""
+        async with server._server_lifespan(server.mcp):
+            mock_get_pool.assert_awaited_once()
+
+    @patch('maratron_ai.server.get_pool', side_effect=OSError("connection refused"))
+    async def test_lifespan_tolerates_unavailable_database(self, mock_get_pool):
+        """Test a failed pre-warm does not stop the server from starting."""
+        async with server._server_lifespan(server.mcp):
+            pass
+
+    def test_backend_options_without_uvloop(self):
+        """Test the stock asyncio loop is used when uvloop is not installed."""
+        with patch('maratron_ai.server.importlib.util.find_spec', return_value=None):
+            assert server._backend_options() == {"use_uvloop": False}
+
+    @patch('maratron_ai.server.cleanup', new_callable=AsyncMock)
+    async def test_serve_cleans_up_when_server_stops(self, mock_cleanup):
+        """Test cleanup runs once the stdio server exits, even on error."""
+        with patch.object(server.mcp, 'run_stdio_async', AsyncMock(side_effect=EOFError())):
+            with pytest.raises(EOFError):
+                await server._serve()
+        
+        mock_cleanup.assert_awaited_once()
+
+    async def test_weather_http_session_shared_until_cleanup(self):
+        """Test weather requests share one HTTP session that cleanup() closes."""
+        from maratron_ai import weather_tools
+        
+        session = weather_tools._get_http_session()
+        assert weather_tools._get_http_session() is session
+        
+        server.DB_POOL = None
+        await server.cleanup()
+        
+        assert session.closed
+        assert weather_tools._http_session is None
+
+    @patch('maratron_ai.server.validate_connection', new_callable=AsyncMock)
+    @patch('maratron_ai.server.get_pool', new_callable=AsyncMock)
+    async def test_health_check_caches_success_only(self, mock_get_pool, mock_validate):
+        """Test a passing health check is reused briefly but a failure is not."""
+        server._last_healthy_at = None
+        mock_validate.side_effect = [False, True]
+        
+        assert await server.health_check() is False
+        assert await server.health_check() is True
+        assert await server.health_check() is True
+        assert mock_validate.await_count == 2
+        server._last_healthy_at = None
+
+    @patch('maratron_ai.server._CLEANUP_TIMEOUT', 0.01)
+    @patch('maratron_ai.server._cleanup_user_contexts', new_callable=AsyncMock)
+    async def test_cleanup_terminates_pool_that_hangs(self, mock_contexts):
+        """Test a pool that will not close is terminated once the timeout passes."""
+        import asyncio
+        async def hang():
+            await asyncio.sleep(1)
+        mock_pool = MagicMock()
+        mock_pool.close = hang
+        server.DB_POOL = mock_pool
+        
+        await server.cleanup()
+        
+        mock_pool.terminate.assert_called_once()
+        assert server.DB_POOL is None
+
     @patch('asyncpg.create_pool')
     async def test_get_pool_reuses_existing(self, mock_create_pool):
         """Test that get_pool reuses existing pool."""
@@ -10,7 +10,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
 from maratron_ai.database_utils import (
     with_retry, handle_database_errors, quote_identifier,
-    execute_with_timeout, fetch_with_timeout, fetchrow_with_timeout,
+    execute_with_timeout, executemany_with_timeout, fetch_with_timeout, fetchrow_with_timeout,
     validate_connection, close_pool,
     DatabaseError, DatabaseConnectionError, DatabaseOperationError
 )
@@ -102,6 +102,14 @@ class TestQuoteIdentifier:
         assert quote_identifier("column123") == '"column123"'
         assert quote_identifier("my_table") == '"my_table"'
 
+    def test_identifier_is_cached(self):
+        """Test repeated valid identifiers are served from the cache."""
+        quote_identifier.cache_clear()
+        quote_identifier("Runs")
+        quote_identifier("Runs")
+        
+        assert quote_identifier.cache_info().hits == 1
+
     def test_empty_identifier(self):
         """Test empty identifier."""
         with pytest.raises(ValueError, match="cannot be empty"):
@@ -162,6 +170,15 @@ class TestTimeoutOperations:
         with pytest.raises(DatabaseOperationError, match="timed out after"):
             await execute_with_timeout(mock_pool, "SLOW QUERY", timeout=0.1)
 
+    async def test_executemany_with_timeout_success(self):
+        """Test successful executemany with timeout."""
+        mock_pool = AsyncMock()
+        rows = [(1, "a"), (2, "b")]
+        
+        await executemany_with_timeout(mock_pool, "INSERT INTO t VALUES ($1, $2)", rows)
+        
+        mock_pool.executemany.assert_called_once_with("INSERT INTO t VALUES ($1, $2)", rows)
+
     async def test_fetch_with_timeout_success(self):
         """Test successful fetch with timeout."""
         mock_pool = AsyncMock()
@@ -0,0 +1,82 @@
+"""Unit tests for user context intelligence."""
+import pytest
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from maratron_ai.user_context.intelligence import ContextIntelligence
+
+
+@pytest.mark.unit
+class TestGoalExtraction:
+    """Test goals are extracted from conversation messages."""
+
+    def test_goals_found_by_each_pattern(self):
+        """Test every goal phrase in a message is reported, including overlapping ones."""
+        conversations = [
+            SimpleNamespace(user_message="I Plan to build up; my goal is to run a marathon"),
+            SimpleNamespace(user_message="How far did I run last week?"),
+            SimpleNamespace(user_message="Training for a half marathon"),
+        ]
+        
+        goals = ContextIntelligence("user-1")._extract_goals_from_conversations(conversations)
+        
+        assert sorted(goals) == [
+            "build up; my goal is to run a marathon",
+            "half marathon",
+            "run a marathon",
+        ]
+
+
+@pytest.mark.unit
+class TestRunningPatterns:
+    """Test insights derived from run dates."""
+
+    def test_consecutive_recent_runs_flag_overtraining(self):
+        """Test five straight days of recent runs are consistent and flag overtraining."""
+        today = date.today()
+        runs = [{"date": (today - timedelta(days=i)).isoformat(), "distance": 5} for i in range(5)]
+        runs.append({"date": "not-a-date", "distance": 5})
+        runs.append({"date": (today - timedelta(days=30)).isoformat(), "distance": 5})
+        
+        insights = ContextIntelligence("user-1").analyze_running_patterns(runs)
+        
+        assert {insight.description for insight in insights} == {
+            "Highly consistent training schedule",
+            "Possible overtraining - high frequency without rest",
+        }
+
+    def test_distance_progression_uses_date_order(self):
+        """Test progression compares the latest three runs by date with the earliest three."""
+        runs = [
+            {"date": "2024-01-05", "distance": 10},
+            {"date": "2024-01-01", "distance": 5},
+            {"date": "2024-01-04", "distance": 10},
+            {"date": "2024-01-02", "distance": 5},
+            {"date": "2024-01-03", "distance": 5},
+            {"date": "2024-01-06", "distance": 10},
+        ]
+        
+        insights = ContextIntelligence("user-1").analyze_running_patterns(runs)
+        
+        assert [insight.type for insight in insights] == ["achievement"]
+
+
+@pytest.mark.unit
+class TestTopicSuggestions:
+    """Test topic suggestions derived from insights."""
+
+    def test_topics_deduplicated_in_first_mention_order(self):
+        """Test each topic appears once, ordered by the first insight that suggests it."""
+        def insight(insight_type):
+            return SimpleNamespace(type=insight_type)
+        
+        topics = ContextIntelligence("user-1")._suggest_relevant_topics(
+            [insight("concern"), insight("pattern"), insight("achievement")],
+            [insight("goal"), insight("concern")],
+        )
+        
+        assert topics == [
+            "Injury prevention and recovery strategies",
+            "Celebrating progress and setting new challenges",
+            "Goal-specific training plans and timelines",
+        ]
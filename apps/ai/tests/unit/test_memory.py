@@ -0,0 +1,46 @@
+"""Unit tests for conversation memory."""
+import pytest
+
+from maratron_ai.user_context.memory import ConversationMemory
+
+
+@pytest.mark.unit
+class TestUserInterests:
+    """Test interests derived from recurring conversation topics."""
+
+    def test_interests_follow_new_conversations(self):
+        """Test repeated topics become interests, most frequent first, as conversations are added."""
+        memory = ConversationMemory("user-1")
+        memory.add_conversation("q1", "a1", entities={"topics": ["shoes", "pacing"]})
+        memory.add_conversation("q2", "a2", entities={"topics": ["pacing"]})
+        assert memory.get_user_interests() == ["pacing"]
+        
+        memory.add_conversation("q3", "a3", entities={"topics": ["shoes", "pacing"]})
+        assert memory.get_user_interests() == ["pacing", "shoes"]
+
+
+@pytest.mark.unit
+class TestLLMContext:
+    """Test the LLM context summary of conversation memory."""
+
+    def test_context_rebuilt_only_after_new_conversation(self):
+        """Test repeated reads reuse the built context until a conversation is added."""
+        memory = ConversationMemory("user-1")
+        memory.add_conversation("How far?", "5k", intent="question", sentiment="positive")
+        
+        first = memory.get_context_for_llm()
+        assert memory.get_context_for_llm() == first
+        assert memory.get_context_for_llm() is not first
+        
+        first["main_interests"].append("mutated")
+        first["unresolved_questions"].clear()
+        again = memory.get_context_for_llm()
+        assert "mutated" not in again["main_interests"]
+        assert again["unresolved_questions"] == ["How far?"]
+        
+        memory.add_conversation("Thanks", "Any time", sentiment="excited")
+        context = memory.get_context_for_llm()
+        
+        assert context["total_conversations"] == 2
+        assert context["conversation_mood"] == "excited"
+        assert context["unresolved_questions"] == ["How far?"]
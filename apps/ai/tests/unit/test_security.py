@@ -33,6 +33,32 @@ class TestSecurityAuditLog:
             assert "BLOCKED" in call_args
             assert "user=user123" in call_args
     
+    @pytest.mark.asyncio
+    async def test_log_data_access_buffered_in_event_loop(self):
+        """Test data access records are batched while an event loop is running."""
+        with patch('src.maratron_ai.security.data_isolation.logger') as mock_logger:
+            SecurityAuditLog.log_data_access("user123", "fetch", "Users", {"id": "1"}, True)
+            SecurityAuditLog.log_data_access("user123", "fetchrow", "Runs", {"id": "2"}, True)
+            mock_logger.info.assert_not_called()
+            
+            SecurityAuditLog.flush()
+            assert mock_logger.info.call_count == 2
+            first, second = (call[0][0] for call in mock_logger.info.call_args_list)
+            assert "op=fetch," in first and "table=Users" in first
+            assert "op=fetchrow," in second and "table=Runs" in second
+            assert "\n" not in first + second
+    
+    @pytest.mark.asyncio
+    async def test_buffered_record_keeps_access_time(self):
+        """Test each flushed line carries the time of its access, not of the flush."""
+        with patch('src.maratron_ai.security.data_isolation.logger'), \
+             patch('src.maratron_ai.security.data_isolation.time.time', return_value=1767225600.25):
+            SecurityAuditLog.log_data_access("user123", "fetch", "Users", {"id": "1"}, True)
+        
+        with patch('src.maratron_ai.security.data_isolation.logger') as mock_logger:
+            SecurityAuditLog.flush()
+            assert "at=2026-01-01T00:00:00.250+00:00," in mock_logger.info.call_args[0][0]
+    
     def test_log_security_violation(self):
         """Test security violation logging."""
         with patch('src.maratron_ai.security.data_isolation.logger') as mock_logger:
@@ -180,6 +206,19 @@ class TestSecureDataAccess:
                 assert result[0]["id"] == "run1"
                 mock_fetch.assert_called_once()
     
+    @pytest.mark.asyncio
+    async def test_get_user_runs_converts_units_in_query(self):
+        """Test get_user_runs passes the preferred unit to the query."""
+        with patch('src.maratron_ai.security.data_isolation.get_current_user_id', return_value="user123"):
+            with patch('src.maratron_ai.security.data_isolation.fetch_with_timeout') as mock_fetch:
+                mock_fetch.return_value = []
+                
+                await self.secure_db.get_user_runs(self.mock_pool, "user123", 10, "kilometers")
+                
+                args = mock_fetch.call_args[0]
+                assert "1.60934" in args[1]
+                assert args[2:] == ("user123", 10, "kilometers", 0)
+    
     @pytest.mark.asyncio
     async def test_get_user_runs_different_user(self):
         """Test get_user_runs blocks access to other user's data."""
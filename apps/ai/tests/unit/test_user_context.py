@@ -0,0 +1,373 @@
+"""Unit tests for user session persistence."""
+import asyncio
+import dataclasses
+import inspect
+import json
+import pytest
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import asyncpg
+
+from maratron_ai.user_context import context
+from maratron_ai.user_context.context import UserContextManager, UserSession
+
+
+@pytest.fixture
+async def manager():
+    """Context manager whose background tasks are stopped after the test."""
+    manager = UserContextManager()
+    yield manager
+    manager._driver_task.cancel()
+
+
+@pytest.fixture
+def mock_conn(mock_pool):
+    """Connection handed out by mock_pool.acquire()."""
+    conn = AsyncMock(spec=asyncpg.Connection)
+    conn.transaction = MagicMock()
+    mock_pool.acquire = MagicMock()
+    mock_pool.acquire.return_value.__aenter__.return_value = conn
+    return conn
+
+
+@pytest.mark.unit
+class TestSessionPersistence:
+    """Test dirty sessions are written back to UserSessions."""
+
+    @patch('maratron_ai.server.get_pool')
+    async def test_sessions_saved_in_one_batch(self, mock_get_pool, manager, mock_pool, mock_conn):
+        """Test new and existing sessions share a single upsert batch."""
+        mock_get_pool.return_value = mock_pool
+        existing = UserSession("user-1")
+        existing.db_id = "db-1"
+        new = UserSession("user-2")
+        for session in (existing, new):
+            session.mark_dirty()
+        
+        saved = await manager._save_sessions_to_db([existing, new])
+        
+        assert saved == 2
+        mock_pool.acquire.assert_called_once()
+        mock_conn.transaction.assert_called_once()
+        mock_conn.executemany.assert_awaited_once()
+        query, rows = mock_conn.executemany.call_args[0]
+        assert "ON CONFLICT (id) DO UPDATE" in query
+        assert [row[0] for row in rows] == ["db-1", new.db_id]
+        assert new.db_id is not None
+        assert not existing._needs_db_save and not new._needs_db_save
+
+    @patch('maratron_ai.server.get_pool')
+    async def test_activity_only_change_skips_session_data(self, mock_get_pool, manager, mock_pool, mock_conn):
+        """Test a session changed only by activity updates just its timestamp columns."""
+        mock_get_pool.return_value = mock_pool
+        session = UserSession("user-1")
+        await manager._save_sessions_to_db([session])
+        
+        session.update_activity()
+        await manager._save_sessions_to_db([session])
+        
+        mock_conn.executemany.assert_awaited_once()
+        query, ids, times, active = mock_conn.execute.call_args[0]
+        assert "UNNEST($1::text[], $2::timestamp[])" in query
+        assert (ids, times, active) == ([session.db_id], [session.last_activity], True)
+        
+        session.conversation_context.last_action = "add_run"
+        session.mark_dirty()
+        await manager._save_sessions_to_db([session])
+        
+        query, rows = mock_conn.executemany.call_args[0]
+        assert "ON CONFLICT (id) DO UPDATE" in query
+        assert json.loads(rows[0][2])["conversation_context"]["last_action"] == "add_run"
+
+    @patch('maratron_ai.server.get_pool')
+    async def test_failed_batch_keeps_sessions_dirty(self, mock_get_pool, manager, mock_pool, mock_conn):
+        """Test a failed write leaves sessions dirty and new ones without an id."""
+        mock_get_pool.return_value = mock_pool
+        mock_conn.executemany.side_effect = Exception("connection lost")
+        session = UserSession("user-1")
+        session.mark_dirty()
+        
+        saved = await manager._save_sessions_to_db([session])
+        
+        assert saved == 0
+        assert session._needs_db_save
+        assert session.db_id is None
+
+
+@pytest.mark.unit
+class TestDirtyTracking:
+    """Test the manager tracks which active sessions need saving."""
+
+    async def test_dirty_set_follows_session_changes(self, manager):
+        """Test sessions join the dirty set when changed and leave it once saved or removed."""
+        session = UserSession("user-1")
+        manager._add_session(session)
+        assert manager._dirty_sessions() == []
+        
+        session.update_activity()
+        assert manager._dirty_sessions() == [session]
+        
+        session.mark_clean()
+        assert manager._dirty_sessions() == []
+        
+        session.mark_dirty()
+        manager._remove_session("user-1")
+        assert manager._dirty_sessions() == []
+        session.mark_dirty()
+        assert manager._dirty_user_ids == set()
+
+
+@pytest.mark.unit
+class TestExpiryHeap:
+    """Test expired sessions are found from the expiry heap."""
+
+    async def test_only_expired_sessions_are_popped(self, manager):
+        """Test active sessions are rescheduled and replaced sessions are dropped."""
+        stale = UserSession("user-1")
+        stale.last_activity -= timedelta(minutes=90)
+        manager._add_session(stale)
+        
+        touched = UserSession("user-2")
+        touched.last_activity -= timedelta(minutes=90)
+        manager._add_session(touched)
+        touched.update_activity()
+        
+        replaced = UserSession("user-3")
+        replaced.last_activity -= timedelta(minutes=90)
+        manager._add_session(replaced)
+        manager._add_session(UserSession("user-3"))
+        
+        assert manager._pop_expired_sessions() == ["user-1"]
+        assert sorted(s.user_id for _, _, s in manager._expiry_heap) == ["user-2", "user-3"]
+
+    def test_expiry_uses_given_timestamp(self):
+        """Test expiry is checked against the caller's timestamp and last_activity round-trips."""
+        session = UserSession("user-1")
+        session.update_activity(now_ts=1_000_000.0)
+        
+        assert session.last_activity == datetime(1970, 1, 12, 13, 46, 40)
+        assert not session.is_expired(now_ts=1_000_000.0 + 3600)
+        assert session.is_expired(now_ts=1_000_000.0 + 3601)
+        
+        session.last_activity = datetime(1970, 1, 1, 0, 1)
+        assert session.expiry_ts() == 60 + 3600
+
+
+@pytest.mark.unit
+class TestBackgroundDriver:
+    """Test one background task runs both session save and cleanup."""
+
+    @patch.object(context, "SESSION_CLEANUP_INTERVAL", 0.02)
+    @patch.object(context, "SESSION_SAVE_INTERVAL", 0.01)
+    async def test_driver_runs_save_and_cleanup_on_their_deadlines(self):
+        """Test saves run more often than cleanups from the single driver task."""
+        manager = UserContextManager()
+        manager._periodic_save_sessions = AsyncMock()
+        manager._cleanup_expired_sessions = AsyncMock()
+        try:
+            await asyncio.sleep(0.065)
+        finally:
+            manager._driver_task.cancel()
+        
+        saves = manager._periodic_save_sessions.await_count
+        cleanups = manager._cleanup_expired_sessions.await_count
+        assert cleanups >= 2
+        assert saves > cleanups
+
+
+@pytest.mark.unit
+class TestSessionDataSerialization:
+    """Test sessionData round-trips with and without orjson."""
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_session_round_trip(self, use_orjson):
+        """Test a serialized session loads back with the same data."""
+        backend = context.orjson if use_orjson else None
+        if use_orjson and backend is None:
+            pytest.skip("orjson not installed")
+        session = UserSession("user-1")
+        session.cached_user_data = {"name": "Ada", "recent_runs_count": 3}
+        session.conversation_context.last_action = "add_run"
+        
+        with patch.object(context, "orjson", backend):
+            restored = UserSession.from_dict(context._loads(context._dumps(session.to_dict())))
+        
+        assert restored.to_dict() == session.to_dict()
+
+    def test_from_dict_reads_iso_last_activity(self):
+        """Test session data written with an ISO last_activity still loads."""
+        data = UserSession("user-1").to_dict()
+        del data["last_activity_ts"]
+        data["last_activity"] = "2026-01-02T03:04:05"
+        
+        session = UserSession.from_dict(data)
+        
+        assert session.last_activity == datetime(2026, 1, 2, 3, 4, 5)
+
+
+@pytest.mark.unit
+class TestUserDataCache:
+    """Test the joined user lookup is reused across reconnections."""
+
+    def setup_method(self):
+        context._user_data_cache.clear()
+
+    @patch('maratron_ai.server.get_pool')
+    async def test_reconnect_reuses_user_row_until_invalidated(self, mock_get_pool, manager, mock_pool):
+        """Test a second set_current_user skips the lookup until the user row changes."""
+        mock_get_pool.return_value = mock_pool
+        mock_pool.fetchrow.return_value = {"id": "user-1", "name": "Ada", "defaultDistanceUnit": "kilometers"}
+        manager._initialized = True
+        manager._load_session_from_db = AsyncMock(return_value=None)
+        
+        session = await manager.set_current_user("user-1")
+        await manager.set_current_user("user-1")
+        
+        assert mock_pool.fetchrow.await_count == 1
+        assert session.preferences.distance_unit == "kilometers"
+        
+        context.invalidate_user_data("user-1")
+        await manager.set_current_user("user-1")
+        assert mock_pool.fetchrow.await_count == 2
+
+    @patch('maratron_ai.server.get_pool')
+    async def test_added_run_and_shoe_drop_cached_user_row(self, mock_get_pool, mock_pool):
+        """Test add_run and add_shoe drop the cached row so recent runs and shoes reload."""
+        from maratron_ai import server
+        mock_get_pool.return_value = mock_pool
+        
+        context._user_data_cache["user-1"] = (time.monotonic(), {"id": "user-1"})
+        await server.add_run("user-1", "2024-01-15", "00:30:00", 5.0)
+        assert "user-1" not in context._user_data_cache
+        
+        context._user_data_cache["user-1"] = (time.monotonic(), {"id": "user-1"})
+        await server.add_shoe("user-1", "Pegasus", 500.0)
+        assert "user-1" not in context._user_data_cache
+
+    @patch('maratron_ai.server.get_pool')
+    async def test_fallback_loads_new_session_in_one_query(self, mock_get_pool, manager, mock_pool):
+        """Test the fallback path fills preferences and cached data from a single row."""
+        mock_get_pool.return_value = mock_pool
+        mock_pool.fetchrow.side_effect = [
+            Exception("json_agg failed"),
+            {"id": "user-1", "name": "Ada", "email": "ada@example.com", "defaultDistanceUnit": "kilometers",
+             "trainingLevel": "advanced", "goals": ["sub-3"], "recent_runs_count": 4},
+        ]
+        manager._initialized = True
+        manager._load_session_from_db = AsyncMock(return_value=None)
+        
+        session = await manager.set_current_user("user-1")
+        
+        assert mock_pool.fetchrow.await_count == 2
+        assert "LEFT JOIN LATERAL" in mock_pool.fetchrow.call_args[0][0]
+        assert session.preferences.distance_unit == "kilometers"
+        assert session.cached_user_data["recent_runs_count"] == 4
+        assert session.cached_user_data["goals"] == ["sub-3"]
+
+
+@pytest.mark.unit
+class TestShutdownFlush:
+    """Test cleanup() stops the background task before the final save."""
+
+    @patch('maratron_ai.server.get_pool')
+    async def test_cancelled_save_leaves_sessions_dirty(self, mock_get_pool, manager, mock_pool, mock_conn):
+        """Test a save cancelled mid-write keeps its sessions queued for the next save."""
+        mock_get_pool.return_value = mock_pool
+        
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
+        
+        mock_conn.executemany.side_effect = hang
+        session = UserSession("user-1")
+        session.mark_dirty()
+        
+        save = asyncio.create_task(manager._save_sessions_to_db([session]))
+        await asyncio.sleep(0.01)
+        save.cancel()
+        await asyncio.gather(save, return_exceptions=True)
+        
+        assert session._needs_db_save
+        assert session.db_id is None
+
+    async def test_cleanup_waits_for_driver_before_flush(self, manager):
+        """Test the driver task has finished before the final flush runs."""
+        driver = manager._driver_task
+        states = []
+        
+        async def save(sessions):
+            states.append(driver.done())
+            return 0
+        
+        manager._save_sessions_to_db = save
+        await manager.cleanup()
+        
+        assert states == [True]
+
+
+@pytest.mark.unit
+class TestConversationContext:
+    """Test conversation context serialization."""
+
+    def test_json_dict_matches_asdict(self):
+        """Test to_json_dict has the same fields and values as dataclasses.asdict."""
+        conversation = context.ConversationContext(last_topic="shoes", mentioned_runs=["run-1"])
+        
+        assert conversation.to_json_dict() == dataclasses.asdict(conversation)
+
+
+@pytest.mark.unit
+class TestSessionEviction:
+    """Test active sessions are capped with least-recently-used eviction."""
+
+    @patch.object(context, "MAX_ACTIVE_SESSIONS", 2)
+    async def test_lru_session_evicted_and_saved(self, manager):
+        """Test the least recently used session is evicted and saved with the next batch."""
+        first, second, third = UserSession("user-1"), UserSession("user-2"), UserSession("user-3")
+        for session in (first, second):
+            manager._add_session(session)
+        first.mark_dirty()
+        manager.current_user_id = "user-1"
+        assert manager.get_current_session() is first
+        
+        manager._add_session(third)
+        
+        assert list(manager.active_sessions) == ["user-1", "user-3"]
+        assert manager._evicted_sessions == []
+        
+        first.mark_dirty()
+        manager._add_session(UserSession("user-4"))
+        assert list(manager.active_sessions) == ["user-3", "user-4"]
+        assert manager._evicted_sessions == [first]
+        
+        saved = []
+        
+        async def save(sessions):
+            saved.extend(sessions)
+            for session in sessions:
+                session.mark_clean()
+            return len(sessions)
+        
+        manager._save_sessions_to_db = save
+        await manager._save_pending_sessions()
+        
+        assert saved == [first]
+        assert manager._evicted_sessions == []
+
+
+@pytest.mark.unit
+class TestRequireUserContext:
+    """Test the tool decorator requiring a current user."""
+
+    def test_wrapper_keeps_tool_metadata(self):
+        """Test the wrapped tool keeps the name, docstring and signature tools are listed with."""
+        async def get_runs(limit: int = 10) -> str:
+            """List recent runs."""
+            return ""
+        
+        wrapped = context.require_user_context()(get_runs)
+        
+        assert wrapped.__name__ == "get_runs"
+        assert wrapped.__doc__ == "List recent runs."
+        assert inspect.signature(wrapped) == inspect.signature(get_runs)